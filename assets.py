@@ -0,0 +1,147 @@
+import struct
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import pygame
+
+from game_logger import GameLogger
+from config import SettingsConfig
+from misc import Singleton
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+class AssetRegistry(metaclass=Singleton):
+
+    def __init__(self):
+        """
+        Decodes every image once and hands the same surface to everyone who asks for it
+        Surfaces are converted to the display format so blits skip the per-pixel conversion,
+        cached by (path, resolution, color mode) and the least recently used are evicted once over the memory budget
+        Also keeps data derived from an image (like the main map's walkability mask) so it is only built once
+        NOTE: Shared surfaces must be treated as read-only
+        """
+        self.__glogger = GameLogger()
+        self.__settings = SettingsConfig()
+        self.__images: OrderedDict[Tuple[str, int | None, str | None, bool], pygame.Surface] = OrderedDict()
+        self.__cached_bytes = 0
+        self.__sizes: Dict[str, Tuple[int, int]] = {}
+        self.__derived: Dict[Tuple[str, str], Any] = {}
+
+    def get_budget_bytes(self) -> int:
+        """
+        Memory budget for cached surfaces, from the asset_cache_budget_mb setting
+        """
+        budget_mb = self.__settings.asset_cache_budget_mb
+        if budget_mb is None:
+            budget_mb = self.__settings.get_default_settings()["asset_cache_budget_mb"]
+        return int(budget_mb) * 1024 * 1024
+
+    def get_image(self, path: str, resolution: int | None = None, color_mode: str | None = None, alpha: bool = False) -> pygame.Surface:
+        """
+        Get the image at path decoded and converted to the display format, decoding it on first use
+        Opaque images (alpha=False) are flattened onto black, the same as blitting them onto a fresh surface
+        """
+        key = (path, resolution, color_mode, alpha)
+        image = self.__images.get(key)
+        if image is not None:
+            self.__images.move_to_end(key)
+            return image
+        return self.add_image(path, resolution, color_mode, alpha, image=pygame.image.load(path))
+
+    def has_image(self, path: str, resolution: int | None = None, color_mode: str | None = None, alpha: bool = False) -> bool:
+        """
+        Is the image already decoded and cached
+        """
+        return (path, resolution, color_mode, alpha) in self.__images
+
+    def add_image(self, path: str, resolution: int | None = None, color_mode: str | None = None, alpha: bool = False, image: pygame.Surface | None = None) -> pygame.Surface:
+        """
+        Convert and cache an image that was decoded somewhere else (like PreloadScheduler's worker)
+        Must be called from the main thread, converting needs the display
+        """
+        key = (path, resolution, color_mode, alpha)
+        image = self.__convert(image, alpha)
+        self.__sizes[path] = image.get_size()
+        self.__images[key] = image
+        self.__cached_bytes += self.__get_surface_bytes(image)
+        self.__glogger.debug("Decoded %s %s, %s MB of images cached", path, image.get_size(), self.__cached_bytes // (1024 * 1024), name=__name__)
+        self.__evict(keep=key)
+        return image
+
+    def get_image_size(self, path: str) -> Tuple[int, int]:
+        """
+        Get the (width, height) of an image without decoding it
+        PNGs are read straight from their IHDR header, anything else is decoded (and kept)
+        """
+        size = self.__sizes.get(path)
+        if size is None:
+            size = self.__read_png_size(path)
+            if size is None:
+                size = self.get_image(path).get_size()
+            self.__sizes[path] = size
+        return size
+
+    def get_derived(self, path: str, kind: str, build: Callable[[pygame.Surface], Any]) -> Any:
+        """
+        Get data derived from the image at path, built from the shared surface on first use
+        """
+        key = (path, kind)
+        if key not in self.__derived:
+            self.__derived[key] = build(self.get_image(path))
+        return self.__derived[key]
+
+    def clear(self):
+        """
+        Drop every cached surface, e.g. after the display mode changed and the converted formats no longer match
+        """
+        self.__images.clear()
+        self.__cached_bytes = 0
+
+    def __convert(self, image: pygame.Surface, alpha: bool) -> pygame.Surface:
+        """
+        Convert a freshly decoded image to the display format, if there is a display yet
+        """
+        if pygame.display.get_surface() is None:
+            return image
+        if alpha:
+            return image.convert_alpha()
+        if image.get_flags() & pygame.SRCALPHA:
+            flattened = pygame.Surface(image.get_size()).convert()
+            flattened.fill((0, 0, 0))
+            flattened.blit(image, (0, 0))
+            return flattened
+        return image.convert()
+
+    def __evict(self, keep: Tuple[str, int | None, str | None, bool]):
+        """
+        Evict least recently used surfaces until back under budget, never the one just loaded
+        Scenes holding on to an evicted surface keep it alive, it just has to be decoded again next time it is asked for
+        """
+        budget = self.get_budget_bytes()
+        while self.__cached_bytes > budget and len(self.__images) > 1:
+            key, image = next(iter(self.__images.items()))
+            if key == keep:
+                break
+            del self.__images[key]
+            self.__cached_bytes -= self.__get_surface_bytes(image)
+            self.__glogger.debug("Evicted %s from the image cache", key[0], name=__name__)
+
+    def __get_surface_bytes(self, surface: pygame.Surface) -> int:
+        """
+        Approximate memory used by a surface's pixels
+        """
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def __read_png_size(self, path: str) -> Tuple[int, int] | None:
+        """
+        Read the width and height out of a PNG's IHDR chunk, None if path is not a PNG
+        """
+        try:
+            with open(path, 'rb') as image_file:
+                header = image_file.read(24)
+        except OSError as e:
+            self.__glogger.error(f"Failed to read the header of {path}", name=__name__, exception=e)
+            return None
+        if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+            return None
+        return struct.unpack(">II", header[16:24])
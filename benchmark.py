@@ -0,0 +1,341 @@
+import os
+# The dummy drivers must be selected before pygame initializes the display or the mixer
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse, json, random, tempfile, time
+from typing import Callable, Dict, List
+
+import pygame
+
+from config import SettingsConfig
+from replay import SeedRegistry
+from maze_generation import GENERATORS, get_generator
+from save_formats import SAVE_BACKENDS, get_save_backend
+import ui
+import main_map
+import puzzle_level_1, puzzle_level_2, puzzle_level_3
+import text_screen
+import lore_objects
+
+RESOLUTIONS = {
+    720: (1280, 720),
+    1080: (1920, 1080),
+    1440: (2560, 1440),
+    2160: (3840, 2160)
+}
+
+SCENES = ["title", "main_map", "puzzle_1", "puzzle_2", "puzzle_3", "credits", "lore_page"]
+
+def main():
+    """
+    Run the benchmark from the command line
+    """
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark for Instance")
+    parser.add_argument("--scenes", nargs="+", choices=SCENES, default=SCENES, help="Scenes to benchmark")
+    parser.add_argument("--resolutions", nargs="+", type=int, choices=list(RESOLUTIONS.keys()), default=list(RESOLUTIONS.keys()), help="Screen heights to benchmark")
+    parser.add_argument("--frames", type=int, default=300, help="Measured frames per scene and resolution")
+    parser.add_argument("--warmup", type=int, default=30, help="Unmeasured frames run before measuring")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the scripted input sequence")
+    parser.add_argument("--maze-size", type=int, default=None, help="Override puzzle_3_difficulty_size for the puzzle_3 scene")
+    parser.add_argument("--maze-generation", action="store_true", help="Time maze generation vs. size for each algorithm instead of frame times")
+    parser.add_argument("--maze-sizes", nargs="+", type=int, default=[100, 250, 500, 1000, 2000], help="Maze sizes for --maze-generation")
+    parser.add_argument("--algorithms", nargs="+", choices=list(GENERATORS.keys()), default=list(GENERATORS.keys()), help="Algorithms for --maze-generation")
+    parser.add_argument("--save-formats", action="store_true", help="Time saving and loading a large save in each save format instead of frame times")
+    parser.add_argument("--save-entries", nargs="+", type=int, default=[100, 1000, 10000], help="Lore entries in the generated saves for --save-formats")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+    if args.maze_generation:
+        results = benchmark_maze_generation(args.maze_sizes, args.algorithms, args.seed)
+        print_maze_generation_results(results)
+    elif args.save_formats:
+        results = benchmark_save_formats(args.save_entries, args.seed)
+        print_save_format_results(results)
+    else:
+        benchmark = FrameTimeBenchmark(frames=args.frames, warmup=args.warmup, seed=args.seed)
+        if args.maze_size is not None:
+            SettingsConfig().override_settings({"puzzle_3_difficulty_size": args.maze_size})
+        results = benchmark.run(args.scenes, args.resolutions)
+        print_results(results)
+    if args.json_path is not None:
+        with open(args.json_path, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize_frame_times(frame_times_ms: List[float]) -> Dict[str, float]:
+    """
+    Reduce a list of frame times (ms) down to the numbers we care about
+    """
+    ordered = sorted(frame_times_ms)
+    total_ms = sum(ordered)
+    return {
+        "frames": len(ordered),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+        "fps": round(len(ordered) / (total_ms / 1000), 1) if total_ms > 0 else 0.0
+    }
+
+def print_results(results: List[dict]):
+    """
+    Print the results as a table
+    """
+    header = f"{'scene':<10} {'res':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'fps':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['scene']:<10} {str(result['resolution']) + 'p':>6} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['max_ms']:>9.3f} {result['fps']:>9.1f}")
+
+def benchmark_maze_generation(sizes: List[int], algorithms: List[str], seed: int) -> List[dict]:
+    """
+    Time how long each maze generation algorithm takes at each size
+    """
+    results = []
+    for algorithm in algorithms:
+        generator = get_generator(algorithm)
+        for size in sizes:
+            start = time.perf_counter()
+            generator.generate(size, random.Random(seed))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            results.append({"algorithm": algorithm, "size": size, "cells": size * size, "generation_ms": round(elapsed_ms, 1)})
+    return results
+
+def print_maze_generation_results(results: List[dict]):
+    """
+    Print the maze generation results as a table
+    """
+    header = f"{'algorithm':<10} {'size':>6} {'cells':>10} {'ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['algorithm']:<10} {result['size']:>6} {result['cells']:>10} {result['generation_ms']:>10.1f}")
+
+def make_large_save(entries: int, seed: int) -> dict:
+    """
+    A save shaped like the real one, padded out with per-lore progress and puzzle stats
+    """
+    rng = random.Random(seed)
+    return {
+        "player_name": "Benchmark",
+        "player_x": 1234,
+        "player_y": 5678,
+        "shown_intro_and_controls": True,
+        "curr_lore": entries // 2,
+        "circle_coords": (rng.randrange(8000), rng.randrange(8000)),
+        "lore_progress": {lore: {"found": rng.random() < 0.5, "found_at": 1700000000 + lore, "circle": (rng.randrange(8000), rng.randrange(8000))} for lore in range(entries)},
+        "puzzle_stats": [{"puzzle": rng.randrange(1, 4), "seconds": rng.random() * 300, "attempts": rng.randrange(10)} for _ in range(entries)]
+    }
+
+def benchmark_save_formats(entry_counts: List[int], seed: int, repeats: int = 5) -> List[dict]:
+    """
+    Time writing and reading a save in each format, best of repeats
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for entries in entry_counts:
+            contents = make_large_save(entries, seed)
+            for name in SAVE_BACKENDS:
+                backend = get_save_backend(name)
+                path = os.path.join(temp_dir, f"save.{backend.extension}")
+                save_times, load_times = [], []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    with open(path, 'wb' if backend.binary else 'w') as save_file:
+                        backend.dump(contents, 1, save_file)
+                    save_times.append((time.perf_counter() - start) * 1000)
+                    start = time.perf_counter()
+                    backend.load(path)
+                    load_times.append((time.perf_counter() - start) * 1000)
+                results.append({"format": name, "entries": entries, "bytes": os.path.getsize(path), "save_ms": round(min(save_times), 2), "load_ms": round(min(load_times), 2)})
+    return results
+
+def print_save_format_results(results: List[dict]):
+    """
+    Print the save format results as a table
+    """
+    header = f"{'format':<8} {'entries':>8} {'bytes':>10} {'save ms':>10} {'load ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['format']:<8} {result['entries']:>8} {result['bytes']:>10} {result['save_ms']:>10.2f} {result['load_ms']:>10.2f}")
+
+class ScriptedInput:
+
+    def __init__(self, seed: int):
+        """
+        Deterministic stand-in for a player holding down movement keys
+        """
+        self.__rng = random.Random(seed)
+        self.__direction = None
+        self.__frames_left = 0
+
+    def next_direction(self) -> str | None:
+        """
+        Direction held this frame, holds each direction for a random number of frames
+        """
+        if self.__frames_left <= 0:
+            self.__direction = self.__rng.choice(["up", "down", "left", "right", None])
+            self.__frames_left = self.__rng.randint(5, 30)
+        self.__frames_left -= 1
+        return self.__direction
+
+    def next_mouse_pos(self, width: int, height: int) -> tuple[int, int]:
+        """
+        A pseudo random mouse position on screen
+        """
+        return (self.__rng.randrange(width), self.__rng.randrange(height))
+
+class FrameTimeBenchmark:
+
+    def __init__(self, frames: int = 300, warmup: int = 30, seed: int = 1234):
+        """
+        Drives each scene the way InstanceMain.main_game_loop does, without a display, and times every frame
+        NOTE: InstanceMain.__init__ never returns (it enters main_game_loop), so scenes are driven individually
+        """
+        self.frames = frames
+        self.warmup = warmup
+        self.seed = seed
+        self.__settings = SettingsConfig()
+        pygame.init()
+
+    def run(self, scenes: List[str], resolutions: List[int]) -> List[dict]:
+        """
+        Benchmark every scene at every resolution
+        """
+        results = []
+        for resolution in resolutions:
+            width, height = RESOLUTIONS[resolution]
+            self.__settings.override_settings({"screen_width": width, "screen_height": height})
+            screen = pygame.display.set_mode((width, height))
+            for scene in scenes:
+                SeedRegistry().reseed(self.seed)
+                step = getattr(self, f"setup_{scene}")(screen, ScriptedInput(self.seed))
+                frame_times = self.time_frames(step)
+                result = {"scene": scene, "resolution": resolution}
+                result.update(summarize_frame_times(frame_times))
+                results.append(result)
+        return results
+
+    def time_frames(self, step: Callable[[], None]) -> List[float]:
+        """
+        Run the warmup frames, then time the measured frames
+        """
+        for _ in range(self.warmup):
+            pygame.event.pump()
+            step()
+            pygame.display.flip()
+        frame_times = []
+        for _ in range(self.frames):
+            start = time.perf_counter()
+            pygame.event.pump()
+            step()
+            pygame.display.flip()
+            frame_times.append((time.perf_counter() - start) * 1000)
+        return frame_times
+
+    def setup_title(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]:
+        """
+        Title screen with the mouse wandering over the buttons
+        """
+        titlescreen_ui = ui.TitleScreenUIElements()
+        def step():
+            screen.fill("black")
+            titlescreen_ui.update(scripted_input.next_mouse_pos(1000, 800), False)
+            titlescreen_ui.draw(screen)
+        return step
+
+    def setup_main_map(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]:
+        """
+        Main map with the player walking around
+        """
+        main_map_image_path = "assets/backgrounds/main_map.png"
+        player = main_map.MapPlayer([100, 100], main_map_image_path)
+        game_map = main_map.MainGameMap(screen, player, main_map_image_path)
+        def step():
+            direction = scripted_input.next_direction()
+            if direction is not None:
+                player.move(direction, game_map.camera_rect, game_map)
+            game_map.draw_map()
+            game_map.check_collision()
+            player.draw(screen, game_map.camera_rect)
+        return step
+
+    def setup_puzzle_1(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]:
+        """
+        Puzzle 1 with the player walking between hitboxes
+        """
+        player = puzzle_level_1.PlayerPuzzle1([100, 100])
+        game_map = puzzle_level_1.GameMapPuzzle1(screen, player)
+        def step():
+            direction = scripted_input.next_direction()
+            if direction is not None:
+                player.move(direction)
+            game_map.draw_map()
+            game_map.hitbox_generator.set_collidability(True)
+            game_map.draw_hitboxes()
+            player.draw(screen)
+        return step
+
+    def setup_puzzle_2(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]:
+        """
+        Puzzle 2 with bouncing hitboxes and a click every 30 frames
+        """
+        game_map = puzzle_level_2.GameMapPuzzle2(screen)
+        frame = [0]
+        def step():
+            frame[0] += 1
+            if frame[0] % 30 == 0:
+                game_map.hitbox_generator.check_click(scripted_input.next_mouse_pos(screen.get_width(), screen.get_height()))
+            game_map.hitbox_generator.update_hitbox_positions()
+            game_map.draw_map()
+            game_map.draw_hitboxes()
+            game_map.draw_message_box("What is your doctor's name so I can schedule an appointment?", screen)
+            game_map.hitbox_generator.set_clickability(True)
+        return step
+
+    def setup_puzzle_3(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]:
+        """
+        Puzzle 3 with the player wandering the maze
+        """
+        maze = puzzle_level_3.Maze()
+        player = puzzle_level_3.MazePlayer((0, 0), maze)
+        game = puzzle_level_3.MazeGame(screen, player, maze)
+        def step():
+            direction = scripted_input.next_direction()
+            if direction is not None:
+                game.update(direction)
+            screen.fill((0, 0, 0))
+            game.draw()
+        return step
+
+    def setup_credits(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]: # pylint: disable=unused-argument
+        """
+        The credits text screen, the longest of the menu text screens
+        """
+        credits_screen = text_screen.TextScreen(screen, text_screen.get_credits_and_attributions_text(), "Back")
+        def step():
+            screen.fill("black")
+            credits_screen.draw()
+        return step
+
+    def setup_lore_page(self, screen, scripted_input: ScriptedInput) -> Callable[[], None]: # pylint: disable=unused-argument
+        """
+        A lore page shown over the main map, the longest one
+        """
+        lore_screen = main_map.TextScreen(screen, lore_objects.Journal_Entry_4().get_lore_text())
+        lore_screen.show()
+        def step():
+            lore_screen.draw()
+        return step
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 
 import os, traceback
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Set
 
 import yaml
 import appdirs
@@ -21,6 +23,102 @@ class GameConfig():
         except Exception:
             print("Keys missing in .env config file", traceback.format_exc())
 
+# Known resolutions and how fast things move at them, anything else scales with the screen height
+SCREEN_SIZE_SPEED_MULTIPLIERS = {2160: 2, 1440: 1.5, 1080: 1, 720: 0.8}
+
+@dataclass(slots=True)
+class Settings:
+    """
+    Typed settings, validated once per load by from_dict()
+    Values derived from them are worked out once here too, so the game can read them directly every frame
+    NOTE: The defaults below are the defaults written to settings.yml
+    """
+    screen_width: int = field(default=1920, metadata={"min": 1})
+    screen_height: int = field(default=1080, metadata={"min": 1})
+    window_mode: str = field(default="windowed", metadata={"choices": ("windowed", "fullscreen", "borderless")})
+    max_fps: int = field(default=60, metadata={"min": 1})
+    puzzle_1_difficulty: int = field(default=10, metadata={"min": 1})
+    puzzle_1_difficulty_mult: int = field(default=870, metadata={"min": 0})
+    puzzle_1_difficulty_speed: int = field(default=7, metadata={"min": 1})
+    puzzle_1_difficulty_fitts: int = field(default=30, metadata={"min": 1})
+    puzzle_2_difficulty_speed: int = field(default=10, metadata={"min": 1})
+    puzzle_2_difficulty_number: int = field(default=20, metadata={"min": 1})
+    puzzle_3_difficulty_size: int = field(default=40, metadata={"min": 3})
+    puzzle_3_algorithm: str = "dfs"
+    subtitles: bool = True
+    debug: bool = False
+    fancy_fonts: bool = True
+    grayscale_mode: bool = False
+    keybind_up: str = "w"
+    keybind_down: str = "s"
+    keybind_right: str = "d"
+    keybind_left: str = "a"
+    keybind_interact: str = "e"
+    asset_cache_budget_mb: int = field(default=512, metadata={"min": 0})
+    preload_scenes: bool = True
+    save_format: str = field(default="binary", metadata={"choices": ("binary", "yaml")})
+    log_level: str = field(default="DEBUG", metadata={"choices": ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")})
+    log_async: bool = True # Log through a queue, a listener thread does the file and terminal I/O
+    log_max_file_mb: int = field(default=10, metadata={"min": 1}) # A session's log is rotated (and compressed) past this
+    log_retention_days: int = field(default=14, metadata={"min": 1})
+    log_max_total_mb: int = field(default=100, metadata={"min": 1}) # Oldest logs are deleted past this
+    telemetry: bool = False # Structured JSON lines event stream next to the log, see telemetry.py
+    # Derived, never written to settings.yml
+    screen_size_speed_multiplier: float = field(default=1, init=False)
+    player_speed: float = field(default=0, init=False) # Pixels per frame on the main map and in puzzle 1
+    puzzle_1_collision_duration: int = field(default=0, init=False) # Milliseconds a puzzle 1 hitbox stays lit
+    puzzle_2_click_duration: int = field(default=0, init=False) # Milliseconds a puzzle 2 hitbox stays lit
+    maze_block_size: int = field(default=0, init=False) # Pixels per cell when the configured maze is fit to the screen
+
+    def __post_init__(self):
+        """
+        Work out the derived values
+        """
+        self.screen_size_speed_multiplier = SCREEN_SIZE_SPEED_MULTIPLIERS.get(self.screen_height, self.screen_height / 1080)
+        self.player_speed = self.puzzle_1_difficulty_speed*self.screen_size_speed_multiplier
+        self.puzzle_1_collision_duration = self.puzzle_1_difficulty_mult*self.puzzle_1_difficulty
+        self.puzzle_2_click_duration = 870*self.puzzle_1_difficulty
+        self.maze_block_size = min(self.screen_width // self.puzzle_3_difficulty_size, self.screen_height // self.puzzle_3_difficulty_size)
+
+    @classmethod
+    def from_dict(cls, settings: Dict[str, Any]) -> "Settings":
+        """
+        Build from the settings.yml contents, anything missing, of the wrong type or out of range gets its default
+        """
+        values = {}
+        for settings_field in fields(cls):
+            if not settings_field.init:
+                continue
+            value = settings.get(settings_field.name, settings_field.default)
+            try:
+                values[settings_field.name] = cls.validate(settings_field, value)
+            except ValueError as e:
+                print(f"Setting {settings_field.name} is invalid ({e}), using {settings_field.default!r}")
+                values[settings_field.name] = settings_field.default
+        return cls(**values)
+
+    @staticmethod
+    def validate(settings_field, value: Any) -> Any:
+        """
+        Check a value against its field's type and limits, floats are rounded for ints (the menu's sliders give floats)
+        Raises ValueError if it doesn't fit
+        """
+        if settings_field.type is int and type(value) is float: # pylint: disable=unidiomatic-typecheck
+            value = round(value)
+        if type(value) is not settings_field.type: # pylint: disable=unidiomatic-typecheck
+            raise ValueError(f"{value!r} is not a {settings_field.type.__name__}")
+        if "min" in settings_field.metadata and value < settings_field.metadata["min"]:
+            raise ValueError(f"{value!r} is below {settings_field.metadata['min']}")
+        if "choices" in settings_field.metadata and value not in settings_field.metadata["choices"]:
+            raise ValueError(f"{value!r} is not one of {', '.join(settings_field.metadata['choices'])}")
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The settings (not the derived values) as written to settings.yml
+        """
+        return {settings_field.name: getattr(self, settings_field.name) for settings_field in fields(self) if settings_field.init}
+
 class SettingsConfig(metaclass=Singleton):
 
     def __init__(self):
@@ -33,38 +131,55 @@ class SettingsConfig(metaclass=Singleton):
         self.__settings = {}
         self.load_settings()
         print(f"Settings loaded: {self.__settings}")
-        self.screen_width = self.__settings.get("screen_width")
-        self.screen_height = self.__settings.get("screen_height")
-        self.window_mode = self.__settings.get("window_mode")
-        self.max_fps = self.__settings.get("max_fps")
-        self.puzzle_1_difficulty = self.__settings.get("puzzle_1_difficulty")
-        self.puzzle_1_difficulty_mult = self.__settings.get("puzzle_1_difficulty_mult")
-        self.puzzle_1_difficulty_speed = self.__settings.get("puzzle_1_difficulty_speed")
-        self.puzzle_1_difficulty_fitts = self.__settings.get("puzzle_1_difficulty_fitts")
-        self.puzzle_2_difficulty_speed = self.__settings.get("puzzle_2_difficulty_speed")
-        self.puzzle_2_difficulty_number = self.__settings.get("puzzle_2_difficulty_number")
-        self.puzzle_3_difficulty_size = self.__settings.get("puzzle_3_difficulty_size")
-        self.subtitles = self.__settings.get("subtitles")
-        self.debug = self.__settings.get("debug")
-        self.fancy_fonts = self.__settings.get("fancy_fonts")
-        self.grayscale_mode = self.__settings.get("grayscale_mode")
-        self.keybind_up = self.__settings.get("keybind_up")
-        self.keybind_down = self.__settings.get("keybind_down")
-        self.keybind_right = self.__settings.get("keybind_right")
-        self.keybind_left = self.__settings.get("keybind_left")
-        self.keybind_interact = self.__settings.get("keybind_interact")
+        self.__apply_settings()
+
+    def __apply_settings(self):
+        """
+        Validate the loaded settings and copy them (and the values derived from them) onto this object
+        Hot paths can hold on to self.values, it is replaced (not changed) whenever the settings change
+        """
+        self.values = Settings.from_dict(self.__settings)
+        self.__settings = {**self.__settings, **self.values.to_dict()}
+        self.screen_width = self.values.screen_width
+        self.screen_height = self.values.screen_height
+        self.window_mode = self.values.window_mode
+        self.max_fps = self.values.max_fps
+        self.puzzle_1_difficulty = self.values.puzzle_1_difficulty
+        self.puzzle_1_difficulty_mult = self.values.puzzle_1_difficulty_mult
+        self.puzzle_1_difficulty_speed = self.values.puzzle_1_difficulty_speed
+        self.puzzle_1_difficulty_fitts = self.values.puzzle_1_difficulty_fitts
+        self.puzzle_2_difficulty_speed = self.values.puzzle_2_difficulty_speed
+        self.puzzle_2_difficulty_number = self.values.puzzle_2_difficulty_number
+        self.puzzle_3_difficulty_size = self.values.puzzle_3_difficulty_size
+        self.puzzle_3_algorithm = self.values.puzzle_3_algorithm
+        self.subtitles = self.values.subtitles
+        self.debug = self.values.debug
+        self.fancy_fonts = self.values.fancy_fonts
+        self.grayscale_mode = self.values.grayscale_mode
+        self.keybind_up = self.values.keybind_up
+        self.keybind_down = self.values.keybind_down
+        self.keybind_right = self.values.keybind_right
+        self.keybind_left = self.values.keybind_left
+        self.keybind_interact = self.values.keybind_interact
+        self.asset_cache_budget_mb = self.values.asset_cache_budget_mb
+        self.preload_scenes = self.values.preload_scenes
+        self.save_format = self.values.save_format
+        self.log_level = self.values.log_level
+        self.log_async = self.values.log_async
+        self.log_max_file_mb = self.values.log_max_file_mb
+        self.log_retention_days = self.values.log_retention_days
+        self.log_max_total_mb = self.values.log_max_total_mb
+        self.telemetry = self.values.telemetry
         # Artificially constructed helpers
-        match self.screen_height:
-            case 2160:
-                self.screen_size_speed_multiplier = 2
-            case 1440:
-                self.screen_size_speed_multiplier = 1.5
-            case 1080:
-                self.screen_size_speed_multiplier = 1
-            case 720:
-                self.screen_size_speed_multiplier = 0.8
-            case _:
-                self.screen_size_speed_multipliere = 1
+        self.screen_size_speed_multiplier = self.values.screen_size_speed_multiplier
+
+    def override_settings(self, overrides: dict):
+        """
+        Override settings in memory only, nothing is written to disk
+        Useful for tooling such as the benchmark suite
+        """
+        self.__settings.update(overrides)
+        self.__apply_settings()
 
     def load_settings(self):
         """
@@ -74,7 +189,8 @@ class SettingsConfig(metaclass=Singleton):
         if exists is True:
             try:
                 with open(self.config_name, 'r') as settings_file:
-                    self.__settings = yaml.unsafe_load(settings_file) # pylint: disable=no-value-for-parameter
+                    # Settings files from older versions are missing newer keys, those get their defaults
+                    self.__settings = {**self.get_default_settings(), **(yaml.safe_load(settings_file) or {})}
             except Exception as e:
                 print("Settings failed to load initially, using defaults", e)
                 self.__settings = self.get_default_settings()
@@ -100,32 +216,17 @@ class SettingsConfig(metaclass=Singleton):
         """
         return self.__settings
 
+    def get_changed_settings(self, previous: Dict) -> Set[str]:
+        """
+        Names of the settings that differ from a previous copy of get_settings_no_refresh()
+        """
+        return {key for key in {**previous, **self.__settings} if previous.get(key) != self.__settings.get(key)}
+
     def get_default_settings(self):
         """
         Default config to write if no config exists somehow
         """
-        return {
-            "screen_width": 1920,
-            "screen_height": 1080,
-            "window_mode": "windowed",
-            "max_fps": 60,
-            "puzzle_1_difficulty": 10,
-            "puzzle_1_difficulty_mult": 870,
-            "puzzle_1_difficulty_speed": 7,
-            "puzzle_1_difficulty_fitts": 30,
-            "puzzle_2_difficulty_speed": 10,
-            "puzzle_2_difficulty_number": 20,
-            "puzzle_3_difficulty_size": 40,
-            "subtitles": True,
-            "debug": False,
-            "fancy_fonts": True,
-            "grayscale_mode": False,
-            "keybind_up": "w",
-            "keybind_down": "s",
-            "keybind_right": "d",
-            "keybind_left": "a",
-            "keybind_interact": "e"
-        }
+        return Settings().to_dict()
 
     def __write_settings_yml_file(self, contents: dict | None = None):
         """
@@ -149,6 +250,7 @@ class SettingsConfig(metaclass=Singleton):
 
     def refresh_from_disk(self):
         """
-        Re-Run __init__ on this Singleton class, thus changing the values to match those on disk
+        Reload the settings from disk and update the values on this Singleton class to match
         """
-        self.__init__() # pylint: disable=unnecessary-dunder-call
+        self.load_settings()
+        self.__apply_settings()
@@ -0,0 +1,160 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+import pygame
+
+from misc import GameColors
+
+FRAME_STAGES = ("events", "update", "draw", "flip", "overlay") # Where InstanceMain.main_game_loop spends a frame
+HISTORY_FRAMES = 120 # Frames kept for the graph and the per scene averages, 2 seconds at 60 FPS
+TEXT_REFRESH_SECONDS = 0.25 # The numbers are re-rendered this often, rendering text every frame would show up in the overlay itself
+GRAPH_SIZE = (240, 60)
+GRAPH_MAX_MS = 50 # Frame times above this are clipped to the top of the graph
+PANEL_PADDING = 6
+PANEL_ALPHA = 180
+
+class DebugOverlay:
+
+    def __init__(self, enabled: bool, max_fps: int):
+        """
+        FPS, a frame time graph and where each frame went (events, update, draw, flip), per scene, drawn over the game
+        Stages are timed by mark(): the time since the last mark goes to the named stage, so marks only go at the end of a stage
+        Everything returns straight away while it is disabled
+        """
+        self.enabled = enabled
+        self.visible = True # F3 hides it without turning off the timing
+        self.__max_fps = max_fps
+        self.__last_mark = time.perf_counter()
+        self.__frame_stages: Dict[str, float] = dict.fromkeys(FRAME_STAGES, 0.0) # ms so far in this frame
+        self.__frame_times: Deque[int] = deque(maxlen=HISTORY_FRAMES) # ms, from Clock.tick
+        self.__scene_stages: Dict[str, Dict[str, Deque[float]]] = {}
+        self.__scene = None # The scene of the last finished frame
+        self.__font = None
+        self.__panel: pygame.Surface | None = None
+        self.__text_rendered_at = 0.0
+        self.__fps = 0.0
+
+    def set_enabled(self, enabled: bool, max_fps: int):
+        """
+        Turn the overlay on or off (the debug setting), forgetting what was recorded
+        """
+        self.enabled = enabled
+        self.__max_fps = max_fps
+        self.__frame_times.clear()
+        self.__scene_stages.clear()
+        self.__scene = None
+        self.__panel = None
+
+    def toggle_visible(self):
+        """
+        Show or hide the overlay, it keeps timing while hidden
+        """
+        self.visible = not self.visible
+
+    def begin_frame(self):
+        """
+        Start timing a frame
+        """
+        if not self.enabled:
+            return
+        self.__last_mark = time.perf_counter()
+        for stage in self.__frame_stages:
+            self.__frame_stages[stage] = 0.0
+
+    def mark(self, stage: str):
+        """
+        The time since the last mark (or begin_frame) was spent in stage
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.__frame_stages[stage] += (now - self.__last_mark) * 1000
+        self.__last_mark = now
+
+    def end_frame(self, scene: str, frame_ms: int, fps: float):
+        """
+        File this frame's stage times under scene, frame_ms and fps come from the pygame Clock
+        """
+        if not self.enabled:
+            return
+        self.__frame_times.append(frame_ms)
+        self.__fps = fps
+        scene_stages = self.__scene_stages.get(scene)
+        if scene_stages is None:
+            scene_stages = self.__scene_stages[scene] = {stage: deque(maxlen=HISTORY_FRAMES) for stage in FRAME_STAGES}
+        for stage, stage_ms in self.__frame_stages.items():
+            scene_stages[stage].append(stage_ms)
+        self.__scene = scene
+
+    def draw(self, screen: pygame.Surface):
+        """
+        Draw the overlay in the top left corner
+        The text panel is only rebuilt every TEXT_REFRESH_SECONDS, each frame is a blit and the graph
+        """
+        if not self.enabled or not self.visible:
+            return
+        now = time.perf_counter()
+        if self.__panel is None or now - self.__text_rendered_at >= TEXT_REFRESH_SECONDS:
+            self.__panel = self.__render_panel()
+            self.__text_rendered_at = now
+        screen.blit(self.__panel, (0, 0))
+        panel_rect = self.__panel.get_rect()
+        self.__draw_graph(screen, pygame.Rect(PANEL_PADDING, panel_rect.bottom - PANEL_PADDING - GRAPH_SIZE[1], *GRAPH_SIZE))
+
+    def __render_panel(self) -> pygame.Surface:
+        """
+        The translucent background with the text on it, and room left at the bottom for the graph
+        """
+        if self.__font is None:
+            self.__font = pygame.font.SysFont("dejavusansmono,consolas,couriernew,monospace", 16) # Lines up the columns
+        lines = [self.__font.render(line, True, GameColors.WHITE.value) for line in self.__get_text()]
+        line_height = self.__font.get_linesize()
+        width = max([GRAPH_SIZE[0]] + [line.get_width() for line in lines]) + PANEL_PADDING * 2
+        height = line_height * len(lines) + GRAPH_SIZE[1] + PANEL_PADDING * 3
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, PANEL_ALPHA))
+        for index, line in enumerate(lines):
+            panel.blit(line, (PANEL_PADDING, PANEL_PADDING + index * line_height))
+        return panel
+
+    def __get_text(self) -> List[str]:
+        """
+        The lines of text: FPS, then average and worst ms per stage for the current scene, then the other scenes' totals
+        """
+        lines = [f"{self.__fps:5.1f} FPS   {self.__get_average(self.__frame_times):5.1f} ms avg   {max(self.__frame_times, default=0)} ms max"]
+        scene = self.__scene
+        if scene is None:
+            return lines
+        lines.append(f"{scene}:")
+        scene_stages = self.__scene_stages[scene]
+        for stage in FRAME_STAGES:
+            lines.append(f"  {stage:<8}{self.__get_average(scene_stages[stage]):6.2f} ms avg {max(scene_stages[stage], default=0):6.2f} max")
+        for other_scene, other_stages in self.__scene_stages.items():
+            if other_scene != scene:
+                total = sum(self.__get_average(stage_times) for stage_times in other_stages.values())
+                lines.append(f"{other_scene}: {total:.2f} ms avg")
+        return lines
+
+    def __get_average(self, times: Deque) -> float:
+        """
+        Mean of times, 0 if empty
+        """
+        return sum(times) / len(times) if times else 0.0
+
+    def __draw_graph(self, surface: pygame.Surface, rect: pygame.Rect):
+        """
+        Frame times as a line, oldest on the left, with a line at the frame budget for max_fps
+        """
+        pygame.draw.rect(surface, (40, 40, 40), rect)
+        budget_ms = 1000 / self.__max_fps if self.__max_fps else 0
+        if 0 < budget_ms < GRAPH_MAX_MS:
+            budget_y = rect.bottom - int(budget_ms / GRAPH_MAX_MS * rect.height)
+            pygame.draw.line(surface, (0, 160, 0), (rect.left, budget_y), (rect.right - 1, budget_y))
+        if len(self.__frame_times) < 2:
+            return
+        step = rect.width / (HISTORY_FRAMES - 1)
+        points: List[Tuple[float, float]] = []
+        for index, frame_ms in enumerate(self.__frame_times):
+            points.append((rect.left + index * step, rect.bottom - 1 - min(frame_ms, GRAPH_MAX_MS) / GRAPH_MAX_MS * (rect.height - 1)))
+        pygame.draw.lines(surface, (255, 200, 0), False, points)
@@ -1,10 +1,57 @@
-import logging, logging.config
-import os, traceback
+import logging, logging.config, logging.handlers
+import os, gzip, time, queue, atexit, shutil, threading, traceback
 from typing import Any
 
 import appdirs
 
-from misc import Singleton, get_human_readable_time_with_timezone, get_unix_timestamp
+from config import SettingsConfig
+from misc import Singleton, get_human_readable_time_with_timezone, get_monotonic_time, get_unix_timestamp
+from startup_profiler import get_startup_profiler
+
+LOG_LEVELS = {
+    "CRIT": logging.CRITICAL,
+    "ERROR": logging.ERROR,
+    "WARN": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG
+}
+
+MAX_RATE_LIMITED_SITES = 1024 # Call sites remembered by the rate limiter, past this they are all forgotten at once
+LOG_BACKUP_COUNT = 5 # Rotated (compressed) files kept per session, on top of the one being written
+
+def gzip_rotator(source: str, dest: str):
+    """
+    RotatingFileHandler rotator: compress the full log file instead of renaming it
+    """
+    with open(source, 'rb') as source_file, gzip.open(dest, 'wb') as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that formats each second's timestamp once, the datefmt has no sub second part and log lines come in bursts
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__last_time = (None, "") # (whole second, formatted), swapped as one so threads never see half of it
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        second = int(record.created)
+        last_second, formatted = self.__last_time
+        if second != last_second:
+            formatted = super().formatTime(record, datefmt)
+            self.__last_time = (second, formatted)
+        return formatted
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands the record over as is, so the message (and any traceback) is formatted on the listener thread
+    The stock one formats on the calling thread, which is the frame loop
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 class GameLogger(metaclass=Singleton):
 
@@ -20,107 +67,189 @@ class GameLogger(metaclass=Singleton):
             self.__log_folder = appdirs.user_log_dir(appname="Instance", appauthor="boredhero")
             os.makedirs(self.__log_folder, exist_ok=True)
             self.__log_file_path = os.path.join(self.__log_folder, f"{self.__start_time_human_readable}.log")
-            logging.basicConfig(
-                level=logging.DEBUG,
-                format="[%(asctime)s][%(levelname)s]%(message)s",
-                datefmt="%Y-%m-%d_%H:%M:%S",
-                handlers=[
-                    logging.FileHandler(self.__log_file_path),
-                    logging.StreamHandler(),  # Log to the console
-                ]
-            )
+            self.__settings = SettingsConfig()
+            self.__listener = None
+            self.__rate_limits = {} # (level, name, msg) -> [monotonic time last logged, calls dropped since]
+            self.__rate_limit_lock = threading.Lock()
+            formatter = CachedTimeFormatter("[%(asctime)s][%(levelname)s]%(message)s", datefmt="%Y-%m-%d_%H:%M:%S")
+            # Each session gets its own file (the time based part), rotated and compressed once it gets too big
+            file_handler = logging.handlers.RotatingFileHandler(self.__log_file_path, maxBytes=self.__settings.log_max_file_mb * 1024 * 1024, backupCount=LOG_BACKUP_COUNT)
+            file_handler.namer = lambda name: f"{name}.gz"
+            file_handler.rotator = gzip_rotator
+            handlers = [
+                file_handler,
+                logging.StreamHandler(),  # Log to the console
+            ]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            if self.__settings.log_async:
+                # The frame loop only puts records on a queue, a listener thread formats them and does the file and terminal I/O
+                log_queue = queue.SimpleQueue()
+                self.__listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+                self.__listener.start()
+                atexit.register(self.shutdown)
+                handlers = [DeferredQueueHandler(log_queue)]
+            logging.basicConfig(handlers=handlers)
             self.__logger = logging.getLogger()
+            self.set_level(self.__settings.log_level)
             self.info("Successful Init GameLogger", name=__name__)
-            self.__clear_log_folder()
+            with get_startup_profiler().phase("game_logger_start_log_retention"):
+                # Old logs are compressed and pruned in the background, the first frame never waits on it
+                self.__retention = threading.Thread(target=self.__apply_log_retention, name="log-retention", daemon=True)
+                self.__retention.start()
         except Exception:
             print(f"[GameLogger Error] Error initializing GameLogger! :: \n{traceback.format_exc()}")
 
-    def __log(self, level: str, msg: str, name: str | None = None, exception: Exception | None = None):
+    def __log(self, level: str, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """
+        Log msg, formatted with args (%-style) only if the level is enabled, and only on the listener thread in async mode
+        With every, the call site (level, name and the unformatted msg) logs at most once per that many seconds,
+        the next message that gets through says how many were dropped in between
+        """
         try:
-            err = ""
+            levelno = LOG_LEVELS.get(level, logging.INFO)
+            if not self.__logger.isEnabledFor(levelno):
+                return
+            if every is not None:
+                dropped = self.__rate_limit((level, name, msg), every)
+                if dropped is None:
+                    return
+                if dropped > 0:
+                    msg = f"{msg} (repeated {dropped} more times)"
+            exc_info = None
             if exception is not None:
-                err = self.__format_exception(exception)
-                err = f"\n{err}"
-            msg = str(msg)
-            match level:
-                case "CRIT":
-                    log_str = f"[{name}] :: {msg}{err}"
-                    self.__logger.critical(log_str)
-                case "ERROR":
-                    log_str = f"[{name}] :: {msg}{err}"
-                    self.__logger.error(log_str)
-                case "WARN":
-                    log_str = f"[{name}] :: {msg}{err}"
-                    self.__logger.warning(log_str)
-                case "DEBUG":
-                    log_str = f"[{name}] :: {msg}{err}"
-                    self.__logger.debug(log_str)
-                case _:
-                    log_str = f"[{name}] :: {msg}{err}"
-                    self.__logger.info(log_str)
-            if name is None:
-                name = "GLogger"
+                exc_info = (exception.__class__, exception, exception.__traceback__) # Formatted with the message, after it
+            if args:
+                self.__logger.log(levelno, f"[{name}] :: {msg}", *args, exc_info=exc_info)
+            else:
+                self.__logger.log(levelno, "[%s] :: %s", name, msg, exc_info=exc_info)
         except Exception:
             print(f"[GameLogger Error] Error logging message: {msg}")
             print(traceback.format_exc())
 
-    def __format_exception(self, ex: Exception) -> str:
-        """Returns a string (formatted with newlines) for logging exceptions!"""
-        try:
-            lines = traceback.format_exception(ex.__class__, ex, ex.__traceback__)
-            text = ''.join(lines)
-            return text
-        except Exception as e:
-            print(f"[GameLogger Error] Error formatting exception: {ex}")
-            self.error("An unknown error occurred while formatting an exception!", name=__name__, exception=e) # This should be fine because we know e will be valid here!
-            return ""
+    def __rate_limit(self, key: tuple, every: float) -> int | None:
+        """
+        None if the call site logged less than every seconds ago (the call is counted), otherwise how many calls were dropped since
+        """
+        now = get_monotonic_time()
+        with self.__rate_limit_lock:
+            state = self.__rate_limits.get(key)
+            if state is not None and now - state[0] < every:
+                state[1] += 1
+                return None
+            if state is None and len(self.__rate_limits) >= MAX_RATE_LIMITED_SITES:
+                self.__rate_limits.clear() # Messages that change every call can't be rate limited, don't let them pile up
+            self.__rate_limits[key] = [now, 0]
+            return 0 if state is None else state[1]
+
+    def flush_repeats(self):
+        """
+        Log how many times each rate limited call site was dropped since it last got through
+        """
+        with self.__rate_limit_lock:
+            pending = [(key, state[1]) for key, state in self.__rate_limits.items() if state[1] > 0]
+            for key, _ in pending:
+                self.__rate_limits[key][1] = 0
+        for (level, name, msg), dropped in pending:
+            self.__logger.log(LOG_LEVELS.get(level, logging.INFO), "[%s] :: %s (repeated %s more times)", name, msg, dropped)
+
+    def set_level(self, level: str):
+        """
+        Only log messages at this level (DEBUG, INFO, WARNING, ERROR or CRITICAL) and above
+        """
+        self.__logger.setLevel(logging.getLevelName(level))
+
+    def shutdown(self):
+        """
+        Write out everything still queued and stop the listener thread, logging after this is synchronous
+        """
+        self.flush_repeats()
+        if self.__listener is None:
+            return
+        self.__listener.stop()
+        for handler in self.__listener.handlers:
+            handler.flush()
+        self.__logger.handlers = list(self.__listener.handlers)
+        self.__listener = None
+
+    def get_session_file_path(self, suffix: str) -> str:
+        """
+        Path for another file belonging to this session (telemetry...) in the log folder, kept by log retention like the log itself
+        """
+        return os.path.join(self.__log_folder, f"{self.__start_time_human_readable}{suffix}")
 
-    def __clear_log_folder(self):
+    def __apply_log_retention(self):
         """
-        Deletes all files in the log folder
+        Compress logs left by earlier sessions, delete the ones past the retention period,
+        then the oldest until the log folder fits the disk cap. The current session's files are never touched
         """
         try:
+            current_prefix = self.__start_time_human_readable # Also covers the session's other files, see get_session_file_path
+            now = time.time()
+            max_age = self.__settings.log_retention_days * 24 * 60 * 60
+            compressed = 0
+            deleted = 0
+            logs = []
             for file in os.listdir(self.__log_folder):
                 file_path = os.path.join(self.__log_folder, file)
-                if os.path.isfile(file_path):
+                if file.startswith(current_prefix) or not os.path.isfile(file_path):
+                    continue
+                if now - os.path.getmtime(file_path) > max_age:
                     os.unlink(file_path)
-            self.info("Successful Delete All Previous Log Files", name=__name__)
+                    deleted += 1
+                    continue
+                if not file.endswith(".gz"):
+                    modified = os.path.getmtime(file_path)
+                    gzip_rotator(file_path, f"{file_path}.gz")
+                    file_path = f"{file_path}.gz"
+                    os.utime(file_path, (modified, modified)) # Keep its age for the retention period
+                    compressed += 1
+                logs.append((os.path.getmtime(file_path), os.path.getsize(file_path), file_path))
+            total_bytes = sum(size for _, size, _ in logs)
+            max_total_bytes = self.__settings.log_max_total_mb * 1024 * 1024
+            for _, size, file_path in sorted(logs):
+                if total_bytes <= max_total_bytes:
+                    break
+                os.unlink(file_path)
+                total_bytes -= size
+                deleted += 1
+            self.info("Log retention: %s compressed, %s deleted, %s KB of old logs kept", compressed, deleted, total_bytes // 1024, name=__name__)
         except Exception as e:
-            print(f"[GameLogger Error] Error clearing log files: {e}")
-            self.error("Error occurred while clearing log files", name=__name__, exception=e)
+            print(f"[GameLogger Error] Error applying log retention: {e}")
+            self.error("Error occurred while applying log retention", name=__name__, exception=e)
 
-    def critical(self, msg: str, name: str | None = None, exception: Exception | None = None):
-        """GameLogger Level CRITICAL"""
+    def critical(self, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """GameLogger Level CRITICAL, args are %-formatted into msg lazily, every rate limits the call site (seconds)"""
         try:
-            self.__log("CRIT", msg, name=name, exception=exception)
+            self.__log("CRIT", msg, *args, name=name, exception=exception, every=every)
         except Exception:
             print("Caught exception in CRITICAL")
 
-    def error(self, msg: str, name: str | None = None, exception: Exception | None = None):
-        """GameLogger Level ERROR"""
+    def error(self, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """GameLogger Level ERROR, args are %-formatted into msg lazily, every rate limits the call site (seconds)"""
         try:
-            self.__log("ERROR", msg, name=name, exception=exception)
+            self.__log("ERROR", msg, *args, name=name, exception=exception, every=every)
         except Exception:
             print("Caught exception in ERROR")
 
-    def warning(self, msg: str, name: str | None = None, exception: Exception | None = None):
-        """GameLogger Level WARNING"""
+    def warning(self, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """GameLogger Level WARNING, args are %-formatted into msg lazily, every rate limits the call site (seconds)"""
         try:
-            self.__log("WARN", msg, name=name, exception=exception)
+            self.__log("WARN", msg, *args, name=name, exception=exception, every=every)
         except Exception:
             print("Caught exception in WARNING")
 
-    def info(self, msg: str, name: str | None = None, exception: Exception | None = None):
-        """GameLogger Level INFO"""
+    def info(self, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """GameLogger Level INFO, args are %-formatted into msg lazily, every rate limits the call site (seconds)"""
         try:
-            self.__log("INFO", msg, name=name, exception=exception)
+            self.__log("INFO", msg, *args, name=name, exception=exception, every=every)
         except Exception:
             print("Caught exception in INFO")
 
-    def debug(self, msg: str, name: str | None = None, exception: Exception | None = None):
-        """GameLogger Level DEBUG"""
+    def debug(self, msg: str, *args: Any, name: str | None = None, exception: Exception | None = None, every: float | None = None):
+        """GameLogger Level DEBUG, args are %-formatted into msg lazily, every rate limits the call site (seconds)"""
         try:
-            self.__log("DEBUG", msg, name=name, exception=exception)
+            self.__log("DEBUG", msg, *args, name=name, exception=exception, every=every)
         except Exception:
             print("Caught exception in DEBUG")
 
@@ -1,16 +1,59 @@
-import time
+import os, sys, time, atexit, shutil, argparse, tempfile
+from typing import Dict
 
+from startup_profiler import get_startup_profiler
+
+if "--profile-startup" in sys.argv:
+    # Has to run before the imports below, anything they already imported would look free
+    get_startup_profiler().enable("startup_profile.json")
+    get_startup_profiler().time_imports(["yaml", "dotenv", "appdirs", "zoneinfo", "pygame", "pygame_menu"])
+get_startup_profiler().begin("import_game_modules")
+
+# pylint: disable=wrong-import-position
 import pygame
 
 from game_logger import GameLogger
 from config import GameConfig, SettingsConfig
 import ui
 from settings_menu import SettingsMenu, GameInNeedOfReload
-from save import SaveDataManager
+from save import SaveDataManager, decode_recorded_save, encode_recorded_save, read_last_played_save
+from save_formats import SaveFormatError, encode_blob, decode_blob
+from replay import GameInput
+from assets import AssetRegistry
+from preload import PreloadScheduler
+from telemetry import Telemetry
+from debug_overlay import DebugOverlay
 import main_map
 import puzzle_level_1, puzzle_level_2, puzzle_level_3
 import text_screen
 import lore_objects
+# pylint: enable=wrong-import-position
+
+get_startup_profiler().end("import_game_modules")
+
+MAIN_MAP_IMAGE_PATH = "assets/backgrounds/main_map.png"
+
+SCENE_MUSIC = {
+    "main_map": "assets/music/gymnopedie_no_1.mp3",
+    "puzzle_1": "assets/music/chopin_prelude_op_28_no_4.ogg",
+    "puzzle_2": "assets/music/violin_partita_no_2_in_d_minor_bwv_1004.mp3",
+    "puzzle_3": "assets/music/IMSLP77318-PMLP07506-gnossiennes_1.mp3"
+}
+
+# What has to be rebuilt when a setting changes, see InstanceMain.apply_settings_changes
+DISPLAY_SETTINGS = {"screen_width", "screen_height", "window_mode"}
+UI_SETTINGS = DISPLAY_SETTINGS | {"fancy_fonts", "debug"}
+SPEED_SETTINGS = {"screen_height", "puzzle_1_difficulty_speed"}
+# Puzzles whose hitboxes are laid out for the screen size and colored for the color mode, they start over when those change
+LAYOUT_SETTINGS = DISPLAY_SETTINGS | {"grayscale_mode"}
+LAYOUT_SCENES = {"puzzle_1", "puzzle_2"}
+SCENE_SETTINGS = {
+    "puzzle_1": {"puzzle_1_difficulty", "puzzle_1_difficulty_mult", "puzzle_1_difficulty_speed", "puzzle_1_difficulty_fitts"},
+    "puzzle_2": {"puzzle_2_difficulty_speed", "puzzle_2_difficulty_number", "puzzle_1_difficulty"}, # Click duration uses puzzle 1's difficulty
+    "puzzle_3": {"puzzle_3_difficulty_size", "puzzle_3_algorithm"}
+}
+
+GAME_SNAPSHOT_VERSION = 2 # Bump when the layout of InstanceMain.snapshot_game changes
 
 class InstanceMain():
 
@@ -18,12 +61,58 @@ class InstanceMain():
         """
         Main class
         """
-        self.create_private_static_class_variable_defaults()
+        self.__profiler = get_startup_profiler()
+        self.__profiler.begin("instance_init")
+        self.__input = GameInput()
+        with self.__profiler.phase("settings_config_yaml"):
+            self.__settings = SettingsConfig() # Before the save, which needs save_format, so the YAML parse is timed here
+        with self.__profiler.phase("save_data_manager"):
+            self.__save_data = self.create_save_data_manager() # Before the lore objects below, they load it too
+        with self.__profiler.phase("lore_objects"):
+            self.create_private_static_class_variable_defaults()
         self.__ginr = GameInNeedOfReload()
-        self.__config = GameConfig()
-        self.__settings = SettingsConfig()
-        self.__save_data = SaveDataManager()
-        self.init_logger()
+        with self.__profiler.phase("game_config_dotenv"):
+            self.__config = GameConfig()
+        with self.__profiler.phase("game_logger"):
+            self.init_logger()
+        self.__preloader = PreloadScheduler()
+        self.__telemetry = Telemetry()
+        with self.__profiler.phase("display_set_mode"):
+            self.set_display_mode()
+            pygame.display.set_caption(f"{self.__config.title} v{self.__config.version}")
+        self.__clock = pygame.time.Clock()
+        self.__overlay = DebugOverlay(self.__settings.debug, self.__settings.max_fps)
+        with self.__profiler.phase("pygame_init_mixer"):
+            pygame.init()
+            pygame.mixer.init()
+        with self.__profiler.phase("init_ui"):
+            self.init_ui()
+        self.__glogger.debug("PZ3 Diff: %s", self.__settings.puzzle_3_difficulty_size)
+        with self.__profiler.phase("init_puzzles"):
+            self.init_puzzles()
+        self.__applied_settings = dict(self.__settings.get_settings_no_refresh()) # What everything above was built with
+        self.__profiler.end("instance_init")
+        self.main_game_loop()
+
+    def create_save_data_manager(self) -> SaveDataManager:
+        """
+        The player's save, except in record and replay mode: those run against a throwaway copy of the save the recording
+        started from (stored in the recording), so the player's save is never touched and a replay starts where its recording did
+        """
+        save_format = self.__settings.save_format
+        if self.__input.mode == "live":
+            return SaveDataManager(save_format=save_format)
+        if self.__input.mode == "record":
+            self.__input.set_start_save(encode_recorded_save(read_last_played_save(save_format=save_format)))
+        start_save = self.__input.get_start_save()
+        save_dir = tempfile.mkdtemp(prefix="instance-save-")
+        atexit.register(shutil.rmtree, save_dir, ignore_errors=True) # Before SaveDataManager registers its flush, so it runs after it
+        return SaveDataManager(save_dir=save_dir, initial_contents=decode_recorded_save(start_save) if start_save is not None else None, save_format=save_format)
+
+    def set_display_mode(self):
+        """
+        (Re)open the window with the current resolution and window mode
+        """
         match self.__settings.window_mode:
             case "windowed":
                 args = pygame.SCALED | pygame.DOUBLEBUF # pylint: disable=unused-variable
@@ -37,24 +126,78 @@ class InstanceMain():
             case _:
                 args = pygame.SCALED | pygame.DOUBLEBUF # pylint: disable=unused-variable
                 self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height))
-        pygame.display.set_caption(f"{self.__config.title} v{self.__config.version}")
-        self.__clock = pygame.time.Clock()
-        pygame.init()
-        pygame.mixer.init()
-        self.init_ui()
-        self.__glogger.debug(f"PZ3 Diff: {self.__settings.puzzle_3_difficulty_size}")
-        self.init_puzzles()
-        self.main_game_loop()
+
+    def apply_settings_changes(self):
+        """
+        Apply settings changed since the last call (or startup), only rebuilding what depends on the changed keys
+        Scenes that need rebuilding are snapshotted first and restored after, so no progress is lost
+        """
+        changed = self.__settings.get_changed_settings(self.__applied_settings)
+        self.__applied_settings = dict(self.__settings.get_settings_no_refresh())
+        if not changed:
+            return
+        self.__glogger.info(f"Applying changed settings: {', '.join(sorted(changed))}", name=__name__)
+        rebuild_scenes = set()
+        if changed & DISPLAY_SETTINGS:
+            self.set_display_mode()
+            AssetRegistry().clear() # Cached surfaces were converted for the old display mode and resolution
+            rebuild_scenes.update(SCENE_MUSIC)
+        if changed & {"grayscale_mode"}:
+            rebuild_scenes.update(LAYOUT_SCENES) # Backgrounds and hitbox colors
+        for scene, scene_settings in SCENE_SETTINGS.items():
+            if changed & scene_settings:
+                rebuild_scenes.add(scene)
+        if changed & UI_SETTINGS:
+            # The menus are laid out for the old settings, rebuild them and reopen whichever one was open
+            titlescreen_visible = self.__titlescreen_ui.visibility
+            level_selector_visible = self.__debug_play_puzzles_ui.visibility
+            save_slots_visible = self.__save_slots_ui is not None and self.__save_slots_ui.visibility
+            self.init_ui()
+            self.__titlescreen_ui.set_visibility(titlescreen_visible)
+            if level_selector_visible:
+                self.__debug_play_puzzles_ui.set_visibility(True)
+            if save_slots_visible:
+                self.open_save_slots()
+        if changed & SPEED_SETTINGS:
+            self.__player_main_map.speed = self.__settings.values.player_speed
+            self.__player_puzzle_1.speed = self.__settings.values.player_speed
+        if rebuild_scenes:
+            regenerate_scenes = {scene for scene, scene_settings in SCENE_SETTINGS.items() if changed & scene_settings}
+            if changed & LAYOUT_SETTINGS:
+                regenerate_scenes |= LAYOUT_SCENES # Restored hitboxes could be off the new screen
+            self.rebuild_scenes(rebuild_scenes, regenerate_scenes)
+        if changed & {"log_level"}:
+            self.__glogger.set_level(self.__settings.log_level)
+        if changed & {"debug", "max_fps"}:
+            self.__overlay.set_enabled(self.__settings.debug, self.__settings.max_fps)
+        if changed & {"telemetry"}:
+            self.__telemetry.set_enabled(self.__settings.telemetry)
+        if changed & {"save_format", "log_async"}:
+            self.__glogger.info("The new save format and log mode are used from the next start", name=__name__)
+
+    def rebuild_scenes(self, scenes: set, regenerate_scenes: set):
+        """
+        Throw away built scenes so they pick up new settings
+        They come back from a snapshot so no progress is lost, except regenerate_scenes which start over (a difficulty changed)
+        """
+        kept_scenes = {scene: scene_snapshot for scene, scene_snapshot in self.snapshot_scenes().items() if scene in scenes and scene not in regenerate_scenes}
+        if "main_map" in scenes:
+            self.__game_map_main = None
+        if "puzzle_1" in scenes:
+            self.__game_map_puzzle_1 = None
+        if "puzzle_2" in scenes:
+            self.__game_map_puzzle_2 = None
+        if "puzzle_3" in scenes:
+            self.__game_map_puzzle_3 = None
+        if "puzzle_3" in regenerate_scenes:
+            self.__maze_pool.settings_changed() # Starts on a maze with the new settings right away
+        self.restore_scenes(kept_scenes)
 
     def save_main_game_state(self):
         """
         Save main game state
         """
-        self.saved_state = {
-            "player_position": self.__player_main_map.position,
-            "lore_status": self.__game_map_main.get_curr_lore(),
-            "circle_coords": self.__game_map_main.get_current_circle_coords()
-        }
+        self.saved_state = self.snapshot_game()
 
     def unload_main_game(self):
         """
@@ -78,14 +221,123 @@ class InstanceMain():
         """
         Restore main game from freezed state
         """
-        main_map_image_path = "assets/backgrounds/main_map.png"
-        self.__player_main_map.position = self.saved_state["player_position"]
-        self.__game_map_main = main_map.MainGameMap(self.__screen, self.__player_main_map, main_map_image_path)
-        self.__game_map_main.set_curr_lore(self.saved_state["lore_status"])
-        self.__game_map_main.set_current_circle_coords(self.saved_state["circle_coords"])
-        pygame.mixer.music.load("main_theme.mp3")  # Reload main game music
+        self.restore_game(self.saved_state, resume=False)
+        self.__playing = True
+        self.__preloader.load_music(SCENE_MUSIC["main_map"]) # Reload main game music
         pygame.mixer.music.play(-1)
+        pygame.mixer.music.set_volume(0.1)
+        self.__playing_map_music = True
+
+    def get_active_scene(self) -> str | None:
+        """
+        Which scene is being played right now, if any
+        """
+        if self.__playing_puzzle_1:
+            return "puzzle_1"
+        if self.__playing_puzzle_2:
+            return "puzzle_2"
+        if self.__playing_puzzle_3:
+            return "puzzle_3"
+        if self.__playing:
+            return "main_map"
+        return None
+
+    def snapshot_game(self) -> bytes:
+        """
+        Snapshot every scene that has been built (and which one is being played) into a compact binary blob
+        Only state goes in, images come back from AssetRegistry and mazes and hitboxes are restored as they were instead of generated
+        The LAYOUT_SETTINGS go in too, LAYOUT_SCENES laid out for another screen or color mode start over on restore
+        """
+        return encode_blob({"active_scene": self.get_active_scene(), "scenes": self.snapshot_scenes(), "layout": self.get_layout()}, GAME_SNAPSHOT_VERSION)
+
+    def get_layout(self) -> Dict:
+        """
+        The current value of each of the LAYOUT_SETTINGS
+        """
+        settings = self.__settings.get_settings_no_refresh()
+        return {key: settings[key] for key in sorted(LAYOUT_SETTINGS)}
+
+    def snapshot_scenes(self) -> Dict:
+        """
+        snapshot() of every scene that has been built, by scene name
+        """
+        scenes = {}
+        if self.__game_map_main is not None:
+            scenes["main_map"] = self.__game_map_main.snapshot()
+        if self.__game_map_puzzle_1 is not None:
+            scenes["puzzle_1"] = self.__game_map_puzzle_1.snapshot()
+        if self.__game_map_puzzle_2 is not None:
+            scenes["puzzle_2"] = self.__game_map_puzzle_2.snapshot()
+        if self.__game_map_puzzle_3 is not None:
+            scenes["puzzle_3"] = self.__game_map_puzzle_3.snapshot()
+        return scenes
+
+    def restore_game(self, snapshot: bytes, resume: bool = True):
+        """
+        Put every scene in a snapshot_game() blob back, scenes that are already built are updated in place
+        With resume, whatever was being played when the snapshot was taken is played again
+        Raises SaveFormatError if the blob is damaged
+        """
+        _, state = decode_blob(snapshot)
+        scenes = state["scenes"]
+        if state.get("layout") != self.get_layout(): # Missing from version 1 snapshots, their layout is unknown
+            scenes = {scene: scene_snapshot for scene, scene_snapshot in scenes.items() if scene not in LAYOUT_SCENES}
+        self.restore_scenes(scenes)
+        if not resume or state["active_scene"] is None:
+            return
+        self.__titlescreen_ui.set_visibility(False)
+        match state["active_scene"]:
+            case "main_map":
+                self.__playing = True
+            case "puzzle_1":
+                self.__playing_puzzle_1 = True
+            case "puzzle_2":
+                self.__playing_puzzle_2 = True
+            case "puzzle_3":
+                self.__playing_puzzle_3 = True
+
+    def restore_scenes(self, scenes: Dict):
+        """
+        Put scenes back from their snapshot(), scenes that are already built are updated in place
+        """
+        if "main_map" in scenes:
+            self.build_scene("main_map")
+            self.__game_map_main.restore(scenes["main_map"])
+        if "puzzle_1" in scenes:
+            if self.__game_map_puzzle_1 is None:
+                self.__game_map_puzzle_1 = puzzle_level_1.GameMapPuzzle1(self.__screen, self.__player_puzzle_1, snapshot=scenes["puzzle_1"])
+            else:
+                self.__game_map_puzzle_1.restore(scenes["puzzle_1"])
+        if "puzzle_2" in scenes:
+            if self.__game_map_puzzle_2 is None:
+                self.__game_map_puzzle_2 = puzzle_level_2.GameMapPuzzle2(self.__screen, snapshot=scenes["puzzle_2"])
+            else:
+                self.__game_map_puzzle_2.restore(scenes["puzzle_2"])
+        if "puzzle_3" in scenes:
+            if self.__game_map_puzzle_3 is None or not self.__game_map_puzzle_3.is_same_maze(scenes["puzzle_3"]):
+                self.__maze = puzzle_level_3.Maze(snapshot=scenes["puzzle_3"]["maze"])
+                self.__player_puzzle_3 = puzzle_level_3.MazePlayer((0, 0), self.__maze)
+                self.__game_map_puzzle_3 = puzzle_level_3.MazeGame(self.__screen, self.__player_puzzle_3, self.__maze)
+            self.__game_map_puzzle_3.restore(scenes["puzzle_3"])
 
+    def preload_scene(self, scene: str):
+        """
+        Start loading everything a scene needs in the background, call it as soon as we know where the player is headed
+        """
+        self.__preloader.preload_music(SCENE_MUSIC[scene])
+        match scene:
+            case "main_map":
+                self.__preloader.preload_image(MAIN_MAP_IMAGE_PATH)
+            case "puzzle_1":
+                self.__preloader.preload_image(*puzzle_level_1.get_background_image_key())
+            case "puzzle_2":
+                self.__preloader.preload_image(*puzzle_level_2.get_background_image_key())
+            case "puzzle_3":
+                self.__maze_pool.prefetch()
+        if self.__settings.preload_scenes:
+            # Build the scene itself on the main thread once its assets are in, while the player is still reading
+            ready = self.__maze_pool.has_ready if scene == "puzzle_3" else None
+            self.__preloader.preload_on_main_thread(scene, lambda: self.build_scene(scene), ready=ready)
 
     def init_logger(self):
         """
@@ -101,21 +353,145 @@ class InstanceMain():
         """
         self.__titlescreen_ui = ui.TitleScreenUIElements()
         self.__debug_play_puzzles_ui = ui.LevelSelectorUIElements()
+        self.__save_slots_ui = None # Built from the save index each time the load screen is opened
+
+    def open_save_slots(self):
+        """
+        Build the load screen from the save index and show it
+        """
+        self.__save_slots_ui = ui.SaveSlotSelectorUIElements(self.__save_data.get_slot_summaries())
+        self.__save_slots_ui.set_visibility(True)
 
     def init_puzzles(self):
         """
         Initialize puzzles
         """
-        main_map_image_path = "assets/backgrounds/main_map.png"
         self.__player_puzzle_1 = puzzle_level_1.PlayerPuzzle1([100, 100])  # Player starting position
-        self.__player_main_map = main_map.MapPlayer([100, 100], main_map_image_path)
-        self.__game_map_puzzle_1 = puzzle_level_1.GameMapPuzzle1(self.__screen, self.__player_puzzle_1)
-        self.__game_map_puzzle_2 = puzzle_level_2.GameMapPuzzle2(self.__screen)
-        self.__game_map_main = main_map.MainGameMap(self.__screen, self.__player_main_map, main_map_image_path)
-        self.__maze = puzzle_level_3.Maze()
-        start_pos = (0, 0)
-        self.__player_puzzle_3 = puzzle_level_3.MazePlayer(start_pos, self.__maze)
-        self.__game_map_puzzle_3 = puzzle_level_3.MazeGame(self.__screen, self.__player_puzzle_3, self.__maze)
+        self.__player_main_map = main_map.MapPlayer([100, 100], MAIN_MAP_IMAGE_PATH)
+        # Scenes are built by build_scene() the first time they are entered (or warmed up by preload_scene())
+        self.__game_map_puzzle_1 = None
+        self.__game_map_puzzle_2 = None
+        self.__game_map_main = None
+        self.__maze = None
+        self.__player_puzzle_3 = None
+        self.__game_map_puzzle_3 = None
+        self.__maze_pool = puzzle_level_3.MazePool() # Nothing is generated until preload_scene("puzzle_3") or build_scene("puzzle_3")
+
+    def build_scene(self, scene: str):
+        """
+        Build a scene if it hasn't been built yet
+        """
+        match scene:
+            case "main_map":
+                if self.__game_map_main is None:
+                    self.__game_map_main = main_map.MainGameMap(self.__screen, self.__player_main_map, MAIN_MAP_IMAGE_PATH)
+                    self.restore_lore_progress()
+            case "puzzle_1":
+                if self.__game_map_puzzle_1 is None:
+                    self.__game_map_puzzle_1 = puzzle_level_1.GameMapPuzzle1(self.__screen, self.__player_puzzle_1)
+            case "puzzle_2":
+                if self.__game_map_puzzle_2 is None:
+                    self.__game_map_puzzle_2 = puzzle_level_2.GameMapPuzzle2(self.__screen)
+            case "puzzle_3":
+                if self.__game_map_puzzle_3 is None:
+                    self.__maze = self.__maze_pool.take()
+                    start_pos = (0, 0)
+                    self.__player_puzzle_3 = puzzle_level_3.MazePlayer(start_pos, self.__maze)
+                    self.__game_map_puzzle_3 = puzzle_level_3.MazeGame(self.__screen, self.__player_puzzle_3, self.__maze)
+
+    def restore_lore_progress(self):
+        """
+        Pick the main map's lore back up where the save left off
+        """
+        curr_lore = self.__save_data.get_curr_lore()
+        if curr_lore == 0:
+            return
+        self.__game_map_main.set_curr_lore(curr_lore)
+        next_lore = getattr(self, f"lore_{curr_lore + 1}", None)
+        if next_lore is None:
+            self.__game_map_main.move_circle((8000, 8000)) # Everything has been found
+        else:
+            self.__game_map_main.move_circle(next_lore.get_location())
+
+    def switch_save_slot(self, slot: int | None = None):
+        """
+        Switch to another save slot (a new one if slot is None), storing where the current one is at first
+        Every scene and player is then reset, so nothing carries over into the other slot
+        """
+        if self.__game_map_main is not None: # Record and replay both do this against their copy of the save, so they stay in step
+            try:
+                self.__save_data.set_game_snapshot(self.snapshot_game()) # So the old slot resumes where it was left
+            except Exception as e:
+                self.__glogger.warning("Failed to snapshot the game before switching save slots", name=__name__, exception=e)
+        if slot is None:
+            self.__save_data.create_slot()
+        else:
+            self.__save_data.select_slot(slot)
+        self.reset_game()
+
+    def reset_game(self):
+        """
+        Forget every scene, player and maze so they are rebuilt from the (newly selected) save
+        """
+        self.__player_main_map = main_map.MapPlayer([100, 100], MAIN_MAP_IMAGE_PATH)
+        self.__player_puzzle_1 = puzzle_level_1.PlayerPuzzle1([100, 100])
+        self.__game_map_main = None
+        self.__game_map_puzzle_1 = None
+        self.__game_map_puzzle_2 = None
+        self.__game_map_puzzle_3 = None
+        self.__maze = None
+        self.__player_puzzle_3 = None
+        self.saved_state = None
+        self.__displayed_all_lore = False
+
+    def start_game(self):
+        """
+        Start (or continue) the main game from the title screen, with the intro for new players
+        """
+        if self.__save_data.get_player_name() is None:
+            self.show_name_input_screen()
+            self.__titlescreen_ui.set_visibility(False)
+            self.__show_intro_screen = True
+            self.__intro_screen = text_screen.TextScreen(self.__screen, text_screen.get_main_game_intro_text(), "Continue")
+            self.__intro_screen.draw()
+            self.__controls_screen = text_screen.TextScreen(self.__screen, text_screen.get_main_game_controls_text(), "Continue")
+            self.preload_scene("main_map")
+        else:
+            self.__titlescreen_ui.set_visibility(False)
+            self.__screen.fill((0, 0, 0))
+            if self.resume_saved_game():
+                return
+            self.__playing = True
+
+    def resume_saved_game(self) -> bool:
+        """
+        Pick the game back up from the snapshot saved on quit, if there is one and nothing has been built yet
+        Recording and replaying always start fresh so recordings play back the same
+        """
+        snapshot = self.__save_data.get_game_snapshot()
+        if snapshot is None or self.__game_map_main is not None or self.__input.mode != "live":
+            return False
+        try:
+            self.restore_game(snapshot)
+        except (SaveFormatError, KeyError, TypeError) as e:
+            self.__glogger.warning("Saved game snapshot failed to restore, starting from the save instead", name=__name__, exception=e)
+            self.__save_data.set_game_snapshot(None)
+            return False
+        self.__glogger.info(f"Resumed saved game in {self.get_active_scene()}", name=__name__)
+        return self.get_active_scene() is not None
+
+    def build_active_scenes(self):
+        """
+        Make sure whatever is being played right now has been built
+        """
+        if self.__playing:
+            self.build_scene("main_map")
+        if self.__playing_puzzle_1:
+            self.build_scene("puzzle_1")
+        if self.__playing_puzzle_2:
+            self.build_scene("puzzle_2")
+        if self.__playing_puzzle_3:
+            self.build_scene("puzzle_3")
 
     def create_private_static_class_variable_defaults(self):
         """
@@ -151,21 +527,21 @@ class InstanceMain():
         """
         current_timestamp = time.time()
         if x_mins is None and x_secs is None:
-            self.__glogger.warning("No time specified", name=__name__)
+            self.__glogger.warning("No time specified", name=__name__, every=5)
             return False
         if x_mins is not None and x_secs is not None:
-            self.__glogger.warning("Both minutes and seconds specified, defaulting to minutes", name=__name__)
+            self.__glogger.warning("Both minutes and seconds specified, defaulting to minutes", name=__name__, every=5)
         if x_mins is not None:
             target_timestamp = utx + x_mins * 60
             ret = current_timestamp >= target_timestamp
             if ret is True:
-                self.__glogger.info(f"I was called (mins), returning {ret}", name=__name__)
+                self.__glogger.info("I was called (mins), returning %s", ret, name=__name__, every=1)
             return ret
         if x_secs is not None:
             target_timestamp = utx + x_secs
             ret = current_timestamp >= target_timestamp
             if ret is True:
-                self.__glogger.info(f"I was called (secs), returning {ret}", name=__name__)
+                self.__glogger.info("I was called (secs), returning %s", ret, name=__name__, every=1)
             return ret
 
     def lore_conditions_init(self):
@@ -223,11 +599,13 @@ class InstanceMain():
                     case 4:
                         self.__glogger.info("Lore 5 found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_5.get_lore_text())
+                        self.preload_scene("puzzle_1") # The next circle is the puzzle, load it while this is being read
                         self.__game_map_main.set_has_player_collided_with_lore(False)
                         self.__game_map_main.move_circle(self.lore_6.get_location())
                     case 5:
                         self.__glogger.info("Puzzle 1 shim found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_6.get_lore_text())
+                        self.preload_scene("main_map") # For when the puzzle is done
                         self.__playing = False # Puzzle 1
                         self.__playing_map_music = False
                         self.__playing_puzzle_1 = True
@@ -261,11 +639,13 @@ class InstanceMain():
                     case 11:
                         self.__glogger.info("Lore 12 found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_12.get_lore_text())
+                        self.preload_scene("puzzle_2") # The next circle is the puzzle, load it while this is being read
                         self.__game_map_main.set_has_player_collided_with_lore(False)
                         self.__game_map_main.move_circle(self.lore_13.get_location())
                     case 12:
                         self.__glogger.info("Puzzle 2 shim found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_13.get_lore_text())
+                        self.preload_scene("main_map") # For when the puzzle is done
                         self.__playing = False # Puzzle 2
                         self.__playing_map_music = False
                         self.__playing_puzzle_2 = True
@@ -284,11 +664,13 @@ class InstanceMain():
                     case 15:
                         self.__glogger.info("Lore 16 found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_16.get_lore_text())
+                        self.preload_scene("puzzle_3") # The next circle is the puzzle, load it while this is being read
                         self.__game_map_main.set_has_player_collided_with_lore(False)
                         self.__game_map_main.move_circle(self.lore_17.get_location())
                     case 16:
                         self.__glogger.info("Puzzle 3 shim found", name=__name__)
                         self.__game_map_main.show_text_screen(self.lore_17.get_lore_text())
+                        self.preload_scene("main_map") # For when the puzzle is done
                         self.__playing = False # Puzzle 3
                         self.__playing_map_music = False
                         self.__playing_puzzle_3 = True
@@ -300,42 +682,41 @@ class InstanceMain():
                             self.__glogger.debug("No more lore to display", name=__name__)
                 self.__game_map_main.set_last_lore_found()
                 self.__game_map_main.set_curr_lore(curr_lore+1)
+                self.__save_data.set_curr_lore(curr_lore+1)
+                self.__telemetry.lore_found(curr_lore)
 
     def main_game_loop(self):
         """
         Main game loop
         """
+        event = pygame.event.Event(pygame.NOEVENT) # Frames without events keep handing the last event on, start with a harmless one
+        self.__profiler.begin("first_frame")
         while self.__running:
+            self.__overlay.begin_frame()
             if self.__ginr.needs_reload:
                 self.__settings.refresh_from_disk()
                 self.__ginr.set_needs_reload(False)
-                match self.__settings.window_mode:
-                    case "windowed":
-                        args = pygame.SCALED | pygame.DOUBLEBUF # pylint: disable=unused-variable
-                        self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height))
-                    case "fullscreen":
-                        args = pygame.SCALED | pygame.FULLSCREEN | pygame.DOUBLEBUF # pylint: disable=unused-variable
-                        self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height), pygame.FULLSCREEN)
-                    case "borderless":
-                        args = pygame.SCALED | pygame.NOFRAME | pygame.DOUBLEBUF # pylint: disable=unused-variable
-                        self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height), pygame.NOFRAME)
-                    case _:
-                        args = pygame.SCALED | pygame.DOUBLEBUF # pylint: disable=unused-variable
-                        self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height))
-                #self.__screen = pygame.display.set_mode((self.__settings.screen_width, self.__settings.screen_height))
-                self.__init__() # pylint: disable=non-parent-init-called, unnecessary-dunder-call
+                self.apply_settings_changes()
+            if not self.__input.begin_frame():
+                self.__glogger.info("Replay finished", name=__name__)
+                self.__running = False
+                break
+            self.__preloader.poll()
+            self.__overlay.mark("update")
             mouse_up = False
-            for event in pygame.event.get():
+            for event in self.__input.get_events():
                 if self.__playing:
                     #self.__glogger.info("hiiii", name=__name__)
                     #self.__glogger.info(f"event: {event}", name=__name__)
                     self.__game_map_main.handle_event(event)
-                    pygame.display.flip()
+                    self.flip_display("events")
                 if event.type == pygame.QUIT:
                     self.__running = False
                 if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                     mouse_up = True
                 if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3 and self.__overlay.enabled:
+                        self.__overlay.toggle_visible()
                     if event.key == pygame.K_ESCAPE:
                         if self.__playing:
                             self.return_to_main_menu()
@@ -345,13 +726,14 @@ class InstanceMain():
                             self.puzzle_2_return_to_main_menu()
                         if self.__playing_puzzle_3:
                             self.puzzle_3_return_to_main_menu()
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Left mouse button
-                    mouse_pos = pygame.mouse.get_pos()
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.__playing_puzzle_2:  # Left mouse button
+                    mouse_pos = self.__input.get_mouse_pos()
                     self.__game_map_puzzle_2.hitbox_generator.check_click(mouse_pos)
+            self.__overlay.mark("events")
             if not self.check_playing_anything():
                 self.__screen.fill("black")
                 if self.__titlescreen_ui.visibility:
-                    ui_action = self.__titlescreen_ui.update(pygame.mouse.get_pos(), mouse_up)
+                    ui_action = self.__titlescreen_ui.update(self.__input.get_mouse_pos(), mouse_up)
                     if ui_action is not None:
                         match ui_action:
                             case ui.GameState.EXIT:
@@ -359,17 +741,10 @@ class InstanceMain():
                             case ui.GameState.SETTINGS:
                                 self.__gamesettings = SettingsMenu(self.__screen) # pylint: disable=unused-private-member
                             case ui.GameState.PLAY:
-                                if self.__save_data.get_player_name() is None:
-                                    self.show_name_input_screen()
-                                    self.__titlescreen_ui.set_visibility(False)
-                                    self.__show_intro_screen = True
-                                    self.__intro_screen = text_screen.TextScreen(self.__screen, text_screen.get_main_game_intro_text(), "Continue")
-                                    self.__intro_screen.draw()
-                                    self.__controls_screen = text_screen.TextScreen(self.__screen, text_screen.get_main_game_controls_text(), "Continue")
-                                else:
-                                    self.__titlescreen_ui.set_visibility(False)
-                                    self.__playing = True
-                                    self.__screen.fill((0, 0, 0))
+                                self.start_game()
+                            case ui.GameState.LOAD_SAVE:
+                                self.__titlescreen_ui.set_visibility(False)
+                                self.open_save_slots()
                             case ui.GameState.CREDITS:
                                 self.__titlescreen_ui.set_visibility(False)
                                 self.__show_credits = True
@@ -385,8 +760,22 @@ class InstanceMain():
                                 self.__debug_play_puzzles_ui.set_visibility(True)
                             case _:
                                 pass
+                if self.__save_slots_ui is not None and self.__save_slots_ui.visibility:
+                    ui_action_slots = self.__save_slots_ui.update(self.__input.get_mouse_pos(), mouse_up)
+                    if ui_action_slots is not None:
+                        self.__save_slots_ui.set_visibility(False)
+                        match ui_action_slots:
+                            case ui.GameState.BACK:
+                                self.__titlescreen_ui.set_visibility(True)
+                            case ui.GameState.NEW_GAME:
+                                self.switch_save_slot()
+                                self.start_game()
+                            case int():
+                                if ui_action_slots != self.__save_data.get_slot():
+                                    self.switch_save_slot(ui_action_slots)
+                                self.start_game()
                 if self.__debug_play_puzzles_ui.visibility:
-                    ui_action_levels = self.__debug_play_puzzles_ui.update(pygame.mouse.get_pos(), mouse_up)
+                    ui_action_levels = self.__debug_play_puzzles_ui.update(self.__input.get_mouse_pos(), mouse_up)
                     if ui_action_levels is not None:
                         match ui_action_levels:
                             case ui.GameState.PLAY_PUZZLE_1:
@@ -394,16 +783,19 @@ class InstanceMain():
                                 self.__debug_play_puzzles_ui.set_visibility(False)
                                 self.__text_screen_1 = text_screen.TextScreen(self.__screen, text_screen.get_puzzle_1_intro_text(), "Continue")
                                 self.__text_screen_1.draw()
+                                self.preload_scene("puzzle_1")
                             case ui.GameState.PLAY_PUZZLE_2:
                                 self.__show_text_screen_2 = True
                                 self.__debug_play_puzzles_ui.set_visibility(False)
                                 self.__text_screen_2 = text_screen.TextScreen(self.__screen, text_screen.get_puzzle_2_intro_text(), "Continue")
                                 self.__text_screen_2.draw()
+                                self.preload_scene("puzzle_2")
                             case ui.GameState.PLAY_PUZZLE_3:
                                 self.__show_text_screen_3 = True
                                 self.__debug_play_puzzles_ui.set_visibility(False)
                                 self.__text_screen_3 = text_screen.TextScreen(self.__screen, text_screen.get_puzzle_3_intro_text(), "Continue")
                                 self.__text_screen_3.draw()
+                                self.preload_scene("puzzle_3")
                 if self.__show_intro_screen:
                     self.__intro_screen.draw()
                     if self.__intro_screen.handle_event(event): # pylint: disable=undefined-loop-variable
@@ -441,29 +833,33 @@ class InstanceMain():
                         self.__titlescreen_ui.set_visibility(True)
                         self.__show_mla_works_cited = False
                 mouse_up = False
+                self.__overlay.mark("draw") # Menus and text screens, mostly drawing
+            self.build_active_scenes() # The menus above may have just started the main map
             self.handle_display_lore_actually(event) # pylint: disable=undefined-loop-variable
+            self.build_active_scenes() # ...and lore pickups may have just started a puzzle
             if self.__playing and not self.__playing_map_music:
-                pygame.mixer.music.load("assets/music/gymnopedie_no_1.mp3")
+                self.__preloader.load_music(SCENE_MUSIC["main_map"])
                 pygame.mixer.music.play(-1)
                 pygame.mixer.music.set_volume(0.1)
                 self.__playing_map_music = True
             if self.__playing_puzzle_1 and not self.__playing_puzzle_1_music:
-                pygame.mixer.music.load("assets/music/chopin_prelude_op_28_no_4.ogg")
+                self.__preloader.load_music(SCENE_MUSIC["puzzle_1"])
                 pygame.mixer.music.play(-1)
                 pygame.mixer.music.set_volume(0.1)
                 self.__playing_puzzle_1_music = True
             if self.__playing_puzzle_2 and not self.__playing_puzzle_2_music:
-                pygame.mixer.music.load("assets/music/violin_partita_no_2_in_d_minor_bwv_1004.mp3")
+                self.__preloader.load_music(SCENE_MUSIC["puzzle_2"])
                 pygame.mixer.music.play(-1)
                 pygame.mixer.music.set_volume(0.1)
                 self.__playing_puzzle_2_music = True
             if self.__playing_puzzle_3 and not self.__playing_puzzle_3_music:
-                pygame.mixer.music.load("assets/music/IMSLP77318-PMLP07506-gnossiennes_1.mp3")
+                self.__preloader.load_music(SCENE_MUSIC["puzzle_3"])
                 pygame.mixer.music.play(-1)
                 pygame.mixer.music.set_volume(0.1)
                 self.__playing_puzzle_3_music = True
+            self.__overlay.mark("update")
             if self.__playing:
-                keys = pygame.key.get_pressed()
+                keys = self.__input.get_pressed()
                 if keys[self.get_pygame_key_for_key(self.__settings.keybind_up)]:
                     self.__player_main_map.move("up", self.__game_map_main.camera_rect, self.__game_map_main)
                 elif keys[self.get_pygame_key_for_key(self.__settings.keybind_down)]:
@@ -472,12 +868,15 @@ class InstanceMain():
                     self.__player_main_map.move("left", self.__game_map_main.camera_rect, self.__game_map_main)
                 elif keys[self.get_pygame_key_for_key(self.__settings.keybind_right)]:
                     self.__player_main_map.move("right", self.__game_map_main.camera_rect, self.__game_map_main)
+                self.__overlay.mark("update")
                 self.__game_map_main.draw_map()
+                self.__overlay.mark("draw")
                 self.__game_map_main.check_collision()
+                self.__overlay.mark("update")
                 self.__player_main_map.draw(self.__screen, self.__game_map_main.camera_rect)
-                pygame.display.flip()
+                self.flip_display()
             if self.__playing_puzzle_1:
-                keys = pygame.key.get_pressed()
+                keys = self.__input.get_pressed()
                 if keys[self.get_pygame_key_for_key(self.__settings.keybind_up)]:
                     self.__player_puzzle_1.move("up")
                 if keys[self.get_pygame_key_for_key(self.__settings.keybind_down)]:
@@ -489,27 +888,33 @@ class InstanceMain():
                 if keys[pygame.K_n]:
                     self.__game_map_puzzle_1.hitbox_generator.reset_hitboxes()
                 if self.__game_map_puzzle_1.all_hitboxes_collided():
+                    self.__telemetry.puzzle_completed("puzzle_1")
                     #self.puzzle_1_return_to_main_menu()
                     self.puzzle_1_return_to_main_map()
+                self.__overlay.mark("update")
                 self.__game_map_puzzle_1.draw_map()
                 self.__game_map_puzzle_1.hitbox_generator.set_collidability(True)
-                self.__game_map_puzzle_1.draw_hitboxes()
+                self.__game_map_puzzle_1.draw_hitboxes() # Also where the hitboxes check for collisions
                 self.__player_puzzle_1.draw(self.__screen)
-                pygame.display.flip()
+                self.flip_display()
             if self.__playing_puzzle_2:
-                keys = pygame.key.get_pressed()
+                keys = self.__input.get_pressed()
                 if keys[pygame.K_n]:
                     self.__game_map_puzzle_2.hitbox_generator.reset_hitboxes()
                 self.__game_map_puzzle_2.hitbox_generator.update_hitbox_positions()
+                self.__overlay.mark("update")
                 self.__game_map_puzzle_2.draw_map()
                 self.__game_map_puzzle_2.draw_hitboxes()
                 self.__game_map_puzzle_2.draw_message_box("What is your doctor's name so I can schedule an appointment?", self.__screen)
+                self.__overlay.mark("draw")
                 self.__game_map_puzzle_2.hitbox_generator.set_clickability(True)
                 if self.__game_map_puzzle_2.hitbox_generator.is_the_one_clicked():
+                    self.__telemetry.puzzle_completed("puzzle_2")
                     self.puzzle_2_return_to_main_map()
-                pygame.display.flip()
+                self.__overlay.mark("update")
+                self.flip_display()
             if self.__playing_puzzle_3:
-                keys = pygame.key.get_pressed()
+                keys = self.__input.get_pressed()
                 if keys[self.get_pygame_key_for_key(self.__settings.keybind_up)]:
                     self.__game_map_puzzle_3.update("up")
                 elif keys[self.get_pygame_key_for_key(self.__settings.keybind_down)]:
@@ -518,18 +923,41 @@ class InstanceMain():
                     self.__game_map_puzzle_3.update("left")
                 elif keys[self.get_pygame_key_for_key(self.__settings.keybind_right)]:
                     self.__game_map_puzzle_3.update("right")
+                self.__overlay.mark("update")
                 self.__screen.fill((0, 0, 0))
                 self.__game_map_puzzle_3.draw()
                 if self.__player_puzzle_3.has_exit_been_triggered():
+                    self.__telemetry.puzzle_completed("puzzle_3")
                     self.puzzle_3_return_to_main_menu()
-                pygame.display.flip()
+                self.flip_display()
             self.__titlescreen_ui.draw(self.__screen)
             if self.__debug_play_puzzles_ui.visibility:
                 self.__debug_play_puzzles_ui.draw(self.__screen)
-            pygame.display.flip()
-            self.__clock.tick(self.__settings.max_fps) # Set the FPS
+            if self.__save_slots_ui is not None and self.__save_slots_ui.visibility:
+                self.__save_slots_ui.draw(self.__screen)
+            self.__overlay.mark("draw")
+            self.__overlay.draw(self.__screen)
+            self.__overlay.mark("overlay")
+            self.flip_display()
+            if self.__profiler.enabled:
+                self.__profiler.end("first_frame")
+                self.__profiler.write_report()
+                self.graceful_exit()
+            if self.__telemetry.enabled:
+                self.__telemetry.scene_changed(self.get_active_scene() or "menu")
+            frame_ms = self.__clock.tick(self.__settings.max_fps) # Set the FPS
+            self.__telemetry.frame(frame_ms, self.__clock.get_rawtime())
+            self.__overlay.end_frame(self.get_active_scene() or "menu", frame_ms, self.__clock.get_fps())
         self.graceful_exit()
 
+    def flip_display(self, stage: str = "draw"):
+        """
+        pygame.display.flip, timed separately for the debug overlay, the time before it since the last mark goes to stage
+        """
+        self.__overlay.mark(stage)
+        pygame.display.flip()
+        self.__overlay.mark("flip")
+
     def get_screen(self):
         """
         Get the screen
@@ -603,10 +1031,7 @@ class InstanceMain():
         self.__playing_puzzle_3 = False # pylint: disable=attribute-defined-outside-init
         self.__titlescreen_ui.set_visibility(True)
         self.__playing_puzzle_3_music = False # pylint: disable=attribute-defined-outside-init
-        self.__maze = puzzle_level_3.Maze()
-        start_pos = (0, 0)
-        self.__player_puzzle_3 = puzzle_level_3.MazePlayer(start_pos, self.__maze)
-        self.__game_map_puzzle_3 = puzzle_level_3.MazeGame(self.__screen, self.__player_puzzle_3, self.__maze)
+        self.__game_map_puzzle_3 = None # A fresh maze is built from the pool next time puzzle 3 is entered
         pygame.mixer.music.stop()
 
     def puzzle_3_return_to_main_map(self):
@@ -615,10 +1040,7 @@ class InstanceMain():
         """
         self.__playing_puzzle_3 = False # pylint: disable=attribute-defined-outside-init
         self.__playing_puzzle_3_music = False # pylint: disable=attribute-defined-outside-init
-        self.__maze = puzzle_level_3.Maze()
-        start_pos = (0, 0)
-        self.__player_puzzle_3 = puzzle_level_3.MazePlayer(start_pos, self.__maze)
-        self.__game_map_puzzle_3 = puzzle_level_3.MazeGame(self.__screen, self.__player_puzzle_3, self.__maze)
+        self.__game_map_puzzle_3 = None # A fresh maze is built from the pool next time puzzle 3 is entered
         pygame.mixer.music.stop()
         self.__playing = True
 
@@ -640,10 +1062,11 @@ class InstanceMain():
         color = color_inactive
         font = pygame.font.Font(None, 32)
         while input_active:
-            for event in pygame.event.get():
+            if not self.__input.begin_frame():
+                self.graceful_exit()
+            for event in self.__input.get_events():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
+                    self.graceful_exit()
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if input_box.collidepoint(event.pos):
                         input_active = not input_active
@@ -771,8 +1194,36 @@ class InstanceMain():
         """
         Gracefully quit the program
         """
+        self.__input.save_recording(self.__settings.get_settings_no_refresh())
+        if self.__game_map_main is not None and self.__input.mode == "live":
+            try:
+                self.__save_data.set_game_snapshot(self.snapshot_game())
+            except Exception as e:
+                self.__glogger.warning("Failed to snapshot the game on exit", name=__name__, exception=e)
+        self.__save_data.flush()
         pygame.quit()
         exit(0)
 
-if __name__ == "__main__":
+def main():
+    """
+    Parse the command line and start the game
+    """
+    parser = argparse.ArgumentParser(description="Instance")
+    parser.add_argument("--record", metavar="PATH", default=None, help="Record every frame of input (and the content seeds) to PATH")
+    parser.add_argument("--replay", metavar="PATH", default=None, help="Play back a recording made with --record without a display")
+    parser.add_argument("--profile-startup", metavar="PATH", nargs="?", const="startup_profile.json", default=None, help="Time each startup phase, write the report to PATH (startup_profile.json) after the first frame and exit")
+    args = parser.parse_args()
+    if args.profile_startup is not None:
+        get_startup_profiler().report_path = args.profile_startup
+    if args.replay is not None:
+        # The dummy drivers must be selected before pygame initializes the display or the mixer
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        replay_settings = GameInput().start_replay(args.replay)
+        SettingsConfig().override_settings(replay_settings)
+    elif args.record is not None:
+        GameInput().start_recording(args.record)
     InstanceMain()
+
+if __name__ == "__main__":
+    main()
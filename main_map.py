@@ -1,14 +1,49 @@
 import time
-from typing import Tuple
+from typing import Dict, Tuple
 
 import pygame
 from pygame.locals import * # pylint: disable=wildcard-import,unused-wildcard-import
-from PIL import Image
 
 from game_logger import GameLogger
 from config import SettingsConfig
+from assets import AssetRegistry
+from text_layout import flatten_layout, layout_wrapped_words
 from lore_objects import Prescription_1
 
+class WalkabilityMap:
+
+    def __init__(self, map_surface: pygame.Surface, blocked_color: Tuple[int, int, int] = (255, 255, 255)):
+        """
+        Collision layer for the main map, built once at load
+        Every pixel of blocked_color is packed into a pygame.mask bitmask, so lookups never touch (or lock) the map surface
+        """
+        self.width, self.height = map_surface.get_size()
+        self.__walls = pygame.mask.from_threshold(map_surface, blocked_color, (1, 1, 1, 255))
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """
+        Is the pixel at (x, y) a wall, pixels off the map are never walls
+        """
+        x, y = int(x), int(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.__walls.get_at((x, y)) == 1
+        return False
+
+    def is_segment_blocked(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+        Is any pixel on the way from start to end a wall, start itself is not checked
+        Checking every pixel in between means a fast move can't skip over a thin wall
+        """
+        dx = end[0] - start[0]
+        dy = end[1] - start[1]
+        steps = int(max(abs(dx), abs(dy)))
+        if steps == 0:
+            return self.is_blocked(end[0], end[1])
+        for step in range(1, steps + 1):
+            if self.is_blocked(start[0] + dx * step / steps, start[1] + dy * step / steps):
+                return True
+        return False
+
 class MainGameMap:
 
     def __init__(self, screen, player, map_image_path: str):
@@ -25,9 +60,10 @@ class MainGameMap:
         if self.__settings.grayscale_mode:
             self.__cb = "bw" # pylint: disable=unused-private-member
         self.image_path = map_image_path
-        self.image = pygame.image.load(self.image_path)
-        self.map_surface = pygame.Surface(self.image.get_size(), flags=pygame.HWSURFACE)
-        self.map_surface.blit(self.image, (0, 0))
+        # Decoded once and shared (with MapPlayer and any later MainGameMap), never drawn onto
+        self.image = AssetRegistry().get_image(self.image_path)
+        self.map_surface = self.image
+        self.walkability = AssetRegistry().get_derived(self.image_path, "walkability", WalkabilityMap)
         self.screen_rect = self.screen.get_rect()
         self.camera_rect = pygame.Rect(0, 0, screen.get_width(), screen.get_height())
         self.curr_lore = 0
@@ -164,7 +200,33 @@ class MainGameMap:
         if self.text_screen and self.text_screen.visible:
             self.text_screen.draw()
         if self.has_player_collided_with_lore:
-            self.__glogger.info("Collision Detected!", name=__name__)
+            self.__glogger.info("Collision Detected!", name=__name__, every=1) # Every frame while the player stands on the lore
+
+    def snapshot(self) -> Dict:
+        """
+        The map's state as plain values, see restore()
+        The map image and walkability mask are not included, they come back from AssetRegistry
+        """
+        return {
+            "player_position": list(self.player.position),
+            "curr_lore": self.curr_lore,
+            "last_lore_found": self.last_lore_found,
+            "circle_coords": list(self.current_circle_coords),
+            "text": self.text_screen.text if self.text_screen and self.text_screen.visible else None
+        }
+
+    def restore(self, snapshot: Dict):
+        """
+        Put the map (and its player) back the way snapshot() found it
+        """
+        self.player.position = tuple(snapshot["player_position"])
+        self.curr_lore = snapshot["curr_lore"]
+        self.last_lore_found = snapshot["last_lore_found"]
+        self.current_circle_coords = tuple(snapshot["circle_coords"])
+        self.has_player_collided_with_lore = False
+        self.hide_text_screen()
+        if snapshot.get("text") is not None:
+            self.show_text_screen(snapshot["text"])
 
     def get_pixel_color(self, position: Tuple[int, int]) -> pygame.Color:
         """
@@ -189,26 +251,23 @@ class MapPlayer:
         self.visibility = True
         self.position = start_pos
         self.map_size = self.get_image_dimensions(map_image_path)
-        self.__glogger.info(f"Map size: {self.map_size}", name=__name__)
-        self.speed = self.__settings.puzzle_1_difficulty_speed*self.__settings.screen_size_speed_multiplier
+        self.__glogger.info("Map size: %s", self.map_size, name=__name__)
+        self.speed = self.__settings.values.player_speed
 
     def get_image_dimensions(self, image_path: str):
         """
         Get the dimensions of an image
         """
-        with Image.open(image_path) as img:
-            width, height = img.size
-        return (width, height)
+        return AssetRegistry().get_image_size(image_path)
 
-    def is_move_hitting_color(self, position: Tuple[int, int], game_map: MainGameMap) -> bool:
+    def is_move_hitting_color(self, position: Tuple[int, int], game_map: MainGameMap, from_position: Tuple[int, int] | None = None) -> bool:
         """
-        Check if the move to the new position is allowed based on the pixel color.
+        Check if the move to the new position is allowed based on the map's walkability bitmap
+        If from_position is given, the whole way there is checked so fast moves can't tunnel through thin walls
         """
-        restricted_color = (255, 255, 255)
-        if 0 <= position[0] < game_map.map_surface.get_width() and 0 <= position[1] < game_map.map_surface.get_height():
-            pixel_color = game_map.get_pixel_color(position)[:3]  # Get RGB components only
-            return pixel_color == restricted_color
-        return False
+        if from_position is None:
+            return game_map.walkability.is_blocked(position[0], position[1])
+        return game_map.walkability.is_segment_blocked(from_position, position)
 
     def move(self, direction, camera_rect, game_map):
         """
@@ -226,7 +285,7 @@ class MapPlayer:
         new_position[0] = max(0, min(new_position[0], self.map_size[0] - 40))
         new_position[1] = max(0, min(new_position[1], self.map_size[1] - 40))
         color_check_position = (new_position[0] + 30, new_position[1] + 30)
-        if self.is_move_hitting_color(color_check_position, game_map):
+        if self.is_move_hitting_color(color_check_position, game_map, from_position=(self.position[0] + 30, self.position[1] + 30)):
             return
         within_camera_x_bounds = camera_rect.left <= new_position[0] <= camera_rect.right - 40
         within_camera_y_bounds = camera_rect.top <= new_position[1] <= camera_rect.bottom - 40
@@ -253,9 +312,11 @@ class TextScreen:
     def __init__(self, screen, text, font_size=32, background_color=(0, 0, 0), text_color=(255, 255, 255), text_width=400):
         """
         Minimal text screen for this
+        The text is laid out and rendered once into a surface, it is redone only if the text, fonts or colors change
         """
         self.__glogger = GameLogger()
         self.screen = screen
+        self.__page = None # (key it was rendered for, text block, where it goes, button label)
         self.text = text
         self.font = pygame.font.Font(None, font_size)
         self.background_color = background_color
@@ -267,32 +328,33 @@ class TextScreen:
         self.button = pygame.Rect(0, 0, 100, 40)
         self.button.center = (self.screen.get_width() // 2, self.screen.get_height() - 50)
 
+    @property
+    def text(self) -> str:
+        """
+        The page's text, setting it re-renders the page on the next draw
+        """
+        return self.__text
+
+    @text.setter
+    def text(self, text: str):
+        self.__text = text
+        self.__page = None
+
     def draw(self):
         """
         draw it, wrap the text
         """
         if not self.visible:
             return
-        self.screen.fill(self.background_color)
-        words = [word.split(' ') for word in self.text.splitlines()]
-        space = self.font.size(' ')[0]
-        max_width = self.text_width
-        x, y = 10, 10
-        for line in words:
-            for word in line:
-                word_surface = self.font.render(word, True, self.text_color)
-                word_width, word_height = word_surface.get_size()
-                if x + word_width >= max_width:
-                    x = 10
-                    y += word_height
-                self.screen.blit(word_surface, (x, y))
-                x += word_width + space
-            x = 10
-            y += word_height
+        page_key = (self.font, self.button_font, self.button_text, self.background_color, self.text_color, self.text_width)
+        if self.__page is None or self.__page[0] != page_key:
+            text_block, text_rect = flatten_layout(layout_wrapped_words(self.font, self.text, self.text_color, self.text_width), self.background_color)
+            self.__page = (page_key, text_block, text_rect, self.button_font.render(self.button_text, True, (0, 0, 0)))
+        _, text_block, text_rect, button_text_surface = self.__page
+        self.screen.fill(self.background_color) # A fill is cheaper than blitting a whole screen sized page
+        self.screen.blit(text_block, text_rect)
         pygame.draw.rect(self.screen, (200, 200, 200), self.button)  # Draw button rectangle
-        button_text_surface = self.button_font.render(self.button_text, True, (0, 0, 0))
-        button_text_rect = button_text_surface.get_rect(center=self.button.center)
-        self.screen.blit(button_text_surface, button_text_rect)
+        self.screen.blit(button_text_surface, button_text_surface.get_rect(center=self.button.center))
 
     def handle_event(self, event):
         """
@@ -318,4 +380,4 @@ class TextScreen:
         """
         self.__glogger.info("Hiding text screen", name=__name__)
         self.visible = False
-        self.__glogger.info(f"Text screen visibility: {self.visible}", name=__name__)
+        self.__glogger.info("Text screen visibility: %s", self.visible, name=__name__)
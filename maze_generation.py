@@ -0,0 +1,204 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+class MazeGenerator(ABC):
+    """
+    Base class for maze generation algorithms
+
+    Mazes are a flat, row-major bytearray of size * size bytes (1 = open, 0 = wall)
+    Cells sit on even coordinates and the odd coordinates between them are the walls that get carved into passages,
+    so algorithms work on a lattice of cells_per_side * cells_per_side cells, indexed y * cells_per_side + x
+    """
+    name = "base"
+
+    def generate(self, size: int, rng: random.Random, start: Tuple[int, int] = (0, 0)) -> bytearray:
+        """
+        Generate a perfect maze (every cell reachable, no loops)
+        """
+        cells_per_side = (size + 1) // 2
+        grid = bytearray(size * size)
+        for y in range(0, size, 2):
+            grid[y * size:(y + 1) * size:2] = b"\x01" * cells_per_side
+        self.carve(grid, size, cells_per_side, rng, (start[1] // 2) * cells_per_side + start[0] // 2)
+        return grid
+
+    @abstractmethod
+    def carve(self, grid: bytearray, size: int, cells_per_side: int, rng: random.Random, start_cell: int) -> None:
+        """
+        Open up the passages between lattice cells
+        """
+
+def open_passage(grid: bytearray, size: int, cells_per_side: int, cell_a: int, cell_b: int) -> None:
+    """
+    Open the wall between two adjacent lattice cells
+    The wall sits halfway between them: ((2ax + 2bx) / 2, (2ay + 2by) / 2) = (ax + bx, ay + by)
+    """
+    ay, ax = divmod(cell_a, cells_per_side)
+    by, bx = divmod(cell_b, cells_per_side)
+    grid[(ay + by) * size + ax + bx] = 1
+
+class DFSBacktrackerGenerator(MazeGenerator):
+    """
+    Randomized depth first search with an explicit stack, long winding corridors
+    Same neighbor order and RNG calls as the original Maze.generate_maze, so seeds produce the same mazes
+    """
+    name = "dfs"
+
+    def carve(self, grid: bytearray, size: int, cells_per_side: int, rng: random.Random, start_cell: int) -> None:
+        n = cells_per_side
+        visited = bytearray(n * n)
+        visited[start_cell] = 1
+        stack = [start_cell]
+        choice = rng.choice
+        while stack:
+            cell = stack[-1]
+            y, x = divmod(cell, n)
+            neighbors = []
+            if y > 0 and not visited[cell - n]:
+                neighbors.append(cell - n)
+            if x > 0 and not visited[cell - 1]:
+                neighbors.append(cell - 1)
+            if y < n - 1 and not visited[cell + n]:
+                neighbors.append(cell + n)
+            if x < n - 1 and not visited[cell + 1]:
+                neighbors.append(cell + 1)
+            if neighbors:
+                next_cell = choice(neighbors)
+                visited[next_cell] = 1
+                open_passage(grid, size, n, cell, next_cell)
+                stack.append(next_cell)
+            else:
+                stack.pop()
+
+class KruskalGenerator(MazeGenerator):
+    """
+    Randomized Kruskal with a union-find, lots of short dead ends
+    """
+    name = "kruskal"
+
+    def carve(self, grid: bytearray, size: int, cells_per_side: int, rng: random.Random, start_cell: int) -> None:
+        n = cells_per_side
+        # Edge e joins cell e >> 1 with its right (e & 1 == 0) or lower (e & 1 == 1) neighbor
+        edges = []
+        for y in range(n):
+            row = y * n
+            for x in range(n):
+                if x < n - 1:
+                    edges.append((row + x) << 1)
+                if y < n - 1:
+                    edges.append(((row + x) << 1) | 1)
+        rng.shuffle(edges)
+        parent = list(range(n * n))
+        joins_left = n * n - 1
+        for edge in edges:
+            cell = edge >> 1
+            other = cell + n if edge & 1 else cell + 1
+            root_a = cell
+            while parent[root_a] != root_a:
+                parent[root_a] = parent[parent[root_a]]
+                root_a = parent[root_a]
+            root_b = other
+            while parent[root_b] != root_b:
+                parent[root_b] = parent[parent[root_b]]
+                root_b = parent[root_b]
+            if root_a != root_b:
+                parent[root_a] = root_b
+                open_passage(grid, size, n, cell, other)
+                joins_left -= 1
+                if joins_left == 0:
+                    break
+
+class WilsonGenerator(MazeGenerator):
+    """
+    Wilson's loop-erased random walks, an unbiased (uniform) maze
+    Slow to get going on big mazes because the first walks have to find a tiny tree
+    """
+    name = "wilson"
+
+    def carve(self, grid: bytearray, size: int, cells_per_side: int, rng: random.Random, start_cell: int) -> None:
+        n = cells_per_side
+        in_tree = bytearray(n * n)
+        in_tree[start_cell] = 1
+        next_cell = [0] * (n * n)
+        choice = rng.choice
+        for walk_start in range(n * n):
+            if in_tree[walk_start]:
+                continue
+            # Walk until the tree is hit, remembering only the last exit from each cell, which erases loops
+            cell = walk_start
+            while not in_tree[cell]:
+                y, x = divmod(cell, n)
+                neighbors = []
+                if y > 0:
+                    neighbors.append(cell - n)
+                if x > 0:
+                    neighbors.append(cell - 1)
+                if y < n - 1:
+                    neighbors.append(cell + n)
+                if x < n - 1:
+                    neighbors.append(cell + 1)
+                next_cell[cell] = choice(neighbors)
+                cell = next_cell[cell]
+            cell = walk_start
+            while not in_tree[cell]:
+                in_tree[cell] = 1
+                open_passage(grid, size, n, cell, next_cell[cell])
+                cell = next_cell[cell]
+
+class EllerGenerator(MazeGenerator):
+    """
+    Eller's algorithm, one row at a time, only ever keeps a single row of set membership around
+    """
+    name = "eller"
+
+    def carve(self, grid: bytearray, size: int, cells_per_side: int, rng: random.Random, start_cell: int) -> None:
+        n = cells_per_side
+        getrandbits = rng.getrandbits
+        row_sets = list(range(n))
+        members: Dict[int, List[int]] = {column: [column] for column in range(n)}
+        next_set_id = n
+        for y in range(n):
+            row = y * n
+            last_row = y == n - 1
+            # Randomly join neighbors that are not connected yet, the last row joins everything left over
+            for x in range(n - 1):
+                set_a, set_b = row_sets[x], row_sets[x + 1]
+                if set_a != set_b and (last_row or getrandbits(1)):
+                    open_passage(grid, size, n, row + x, row + x + 1)
+                    if len(members[set_a]) < len(members[set_b]):
+                        set_a, set_b = set_b, set_a
+                    for column in members[set_b]:
+                        row_sets[column] = set_a
+                    members[set_a].extend(members.pop(set_b))
+            if last_row:
+                break
+            # Every set has to continue down into the next row at least once
+            next_row_sets = [-1] * n
+            for set_id, columns in members.items():
+                going_down = [column for column in columns if getrandbits(1)]
+                if not going_down:
+                    going_down = [rng.choice(columns)]
+                for column in going_down:
+                    open_passage(grid, size, n, row + column, row + n + column)
+                    next_row_sets[column] = set_id
+            members = {}
+            for column in range(n):
+                if next_row_sets[column] == -1:
+                    next_row_sets[column] = next_set_id
+                    next_set_id += 1
+                members.setdefault(next_row_sets[column], []).append(column)
+            row_sets = next_row_sets
+
+GENERATORS = {
+    DFSBacktrackerGenerator.name: DFSBacktrackerGenerator,
+    WilsonGenerator.name: WilsonGenerator,
+    EllerGenerator.name: EllerGenerator,
+    KruskalGenerator.name: KruskalGenerator
+}
+
+def get_generator(name: str | None) -> MazeGenerator:
+    """
+    Get a generator by name, unknown names fall back to the DFS backtracker
+    """
+    return GENERATORS.get(name, DFSBacktrackerGenerator)()
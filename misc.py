@@ -1,8 +1,10 @@
 import time
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone, tzinfo
 from enum import Enum
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-import pytz
+DEFAULT_TIME_STRING_FORMAT = "%m-%d-%Y %H:%M:%S"
 
 class Singleton(type):
     _instances = {}
@@ -21,26 +23,54 @@ def get_unix_timestamp() -> int:
     """
     return int(time.time())
 
+def get_monotonic_time() -> float:
+    """
+    Seconds on the monotonic clock, only meaningful as a difference
+    Use it for timing anything in game, unlike the unix timestamp it never jumps when the system clock is changed
+    """
+    return time.monotonic()
+
+def get_seconds_since(monotonic_start: float) -> float:
+    """
+    Seconds elapsed since an earlier get_monotonic_time()
+    """
+    return time.monotonic() - monotonic_start
+
+@lru_cache(maxsize=None)
+def get_timezone(timezone: str) -> tzinfo:
+    """
+    The tzinfo for an IANA timezone name, looked up once
+    Falls back to UTC if the timezone database doesn't have it (no tzdata installed)
+    """
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"Timezone {timezone} not found, using UTC")
+        return dt_timezone.utc
+
+@lru_cache(maxsize=256)
+def format_unix_timestamp(unix_timestamp: int, timezone: str | None = None, time_string_format: str = DEFAULT_TIME_STRING_FORMAT) -> str:
+    """
+    Format a whole second unix timestamp in a timezone (the system's local time if None), cached since the same few seconds get formatted over and over
+    """
+    if timezone is None:
+        return datetime.fromtimestamp(unix_timestamp).astimezone().strftime(time_string_format)
+    return datetime.fromtimestamp(unix_timestamp, tz=get_timezone(timezone)).strftime(time_string_format)
 
-def get_human_readable_time_with_timezone(unix_timestamp=None, timezone="America/New_York", time_string_format="%m-%d-%Y %H:%M:%S", now=False) -> str:
+def get_human_readable_time_with_timezone(unix_timestamp=None, timezone=None, time_string_format=DEFAULT_TIME_STRING_FORMAT, now=False) -> str:
     """
     Get a human readable time with timezone.
 
     :param int unix_timestamp: UNIX timestamp
-    :param str timezone: Timezone OPTIONAL: Default is "America/New_York"
+    :param str timezone: Timezone OPTIONAL: Default is the system's local time
     :param str time_string_format: OPTIONAL: Time string format. Default is "%m-%d-%Y %H:%M:%S"
     :param bool now: OPTIONAL: If True, return the current time. Default is False
 
     :returns str: Human readable time with timezone
     """
-    if now is True:
-        unix_timestamp = int(time.time())
-    if unix_timestamp is None:
-        unix_timestamp = int(time.time())
-    local_tz = pytz.timezone(timezone)
-    dt = datetime.fromtimestamp(int(unix_timestamp))
-    local_dt = local_tz.localize(dt, is_dst=None)
-    return local_dt.strftime(time_string_format)
+    if now is True or unix_timestamp is None:
+        unix_timestamp = time.time()
+    return format_unix_timestamp(int(unix_timestamp), timezone, time_string_format)
 
 class GameColors(Enum):
     """
@@ -0,0 +1,145 @@
+import io, os, queue, threading
+from typing import Any, Callable, Dict, List, Tuple
+
+import pygame
+
+from game_logger import GameLogger
+from assets import AssetRegistry
+from misc import Singleton
+
+class PreloadScheduler(metaclass=Singleton):
+
+    def __init__(self):
+        """
+        Loads the upcoming scene's assets on a worker thread while the player is reading a text screen,
+        so the frame that actually switches scenes does no file I/O
+        Music is read into memory and images are decoded off the main thread, anything touching the display
+        (converting images, loading the mixer) is finished on the main thread in poll()
+        NOTE: The worker is a daemon thread, like MazePool's, and shares the GIL with the main loop
+        """
+        self.__glogger = GameLogger()
+        self.__requests = queue.Queue()
+        self.__finished = queue.Queue() # (kind, key, result) handed back to the main thread
+        self.__pending = set() # Requested but not finished yet, only touched from the main thread
+        self.__music: Dict[str, bytes] = {}
+        self.__music_file = None # The mixer streams from this, it has to stay alive while the track plays
+        self.__results: Dict[str, Any] = {}
+        self.__main_thread_builds: List[Tuple[str, Callable[[], Any], Callable[[], bool] | None]] = []
+        self.__worker = threading.Thread(target=self.__work, name="preload", daemon=True)
+        self.__worker.start()
+
+    def __work(self):
+        """
+        Worker thread: run every requested load and hand the result back
+        """
+        while True:
+            kind, key, load = self.__requests.get()
+            try:
+                result = load()
+            except Exception as e:
+                self.__glogger.warning(f"Failed to preload {key}, it will be loaded when it is needed", name=__name__, exception=e)
+                result = None
+            self.__finished.put((kind, key, result))
+
+    def preload_music(self, path: str):
+        """
+        Read a music file into memory in the background
+        """
+        if path in self.__music or ("music", path) in self.__pending:
+            return
+        self.__submit("music", path, lambda: self.__read_file(path))
+
+    def preload_image(self, path: str, resolution: int | None = None, color_mode: str | None = None, alpha: bool = False):
+        """
+        Decode an image in the background, it is converted and cached in AssetRegistry by the next poll()
+        """
+        key = (path, resolution, color_mode, alpha)
+        if AssetRegistry().has_image(*key) or ("image", key) in self.__pending:
+            return
+        self.__submit("image", key, lambda: pygame.image.load(io.BytesIO(self.__read_file(path)), os.path.splitext(path)[1].lstrip(".")))
+
+    def preload_task(self, key: str, load: Callable[[], Any]):
+        """
+        Run any other (thread safe) loading work in the background, the result is picked up with take_result(key)
+        """
+        if key in self.__results or ("task", key) in self.__pending:
+            return
+        self.__submit("task", key, load)
+
+    def preload_on_main_thread(self, key: str, build: Callable[[], Any], ready: Callable[[], bool] | None = None):
+        """
+        Run work that has to happen on the main thread (building a scene, anything that converts surfaces) during a later poll()
+        It waits until the worker has nothing left to load (and ready() is True, if given), and only one runs per frame
+        """
+        if any(queued_key == key for queued_key, _, _ in self.__main_thread_builds):
+            return
+        self.__main_thread_builds.append((key, build, ready))
+
+    def poll(self):
+        """
+        Finish whatever the worker is done with, call once per frame on the main thread
+        """
+        self.__collect_finished()
+        if self.__pending:
+            return
+        for index, (key, build, ready) in enumerate(self.__main_thread_builds):
+            if ready is None or ready():
+                del self.__main_thread_builds[index]
+                try:
+                    build()
+                except Exception as e:
+                    self.__glogger.warning(f"Failed to warm up {key}, it will be built when it is needed", name=__name__, exception=e)
+                return
+
+    def __collect_finished(self):
+        """
+        Hand everything the worker finished over to its owner
+        """
+        while True:
+            try:
+                kind, key, result = self.__finished.get_nowait()
+            except queue.Empty:
+                return
+            self.__pending.discard((kind, key))
+            if result is None:
+                continue
+            match kind:
+                case "music":
+                    self.__music[key] = result
+                case "image":
+                    AssetRegistry().add_image(*key, image=result)
+                case _:
+                    self.__results[key] = result
+
+    def take_result(self, key: str, default: Any = None) -> Any:
+        """
+        Get (and forget) the result of a preload_task, default if it never ran or has not finished
+        """
+        self.__collect_finished()
+        return self.__results.pop(key, default)
+
+    def load_music(self, path: str):
+        """
+        pygame.mixer.music.load, but from memory if the track was preloaded
+        """
+        self.__collect_finished()
+        data = self.__music.get(path)
+        if data is None:
+            pygame.mixer.music.load(path)
+            return
+        self.__music_file = io.BytesIO(data)
+        pygame.mixer.music.load(self.__music_file, os.path.splitext(path)[1].lstrip("."))
+
+    def __submit(self, kind: str, key: str | Tuple, load: Callable[[], Any]):
+        """
+        Queue a load for the worker
+        """
+        self.__pending.add((kind, key))
+        self.__requests.put((kind, key, load))
+
+    def __read_file(self, path: str) -> bytes:
+        """
+        Read a whole file
+        """
+        with open(path, 'rb') as preload_file:
+            return preload_file.read()
@@ -1,29 +1,39 @@
-import math, random
-from typing import Tuple
+import math
+from typing import Dict, List, Tuple
 
 import pygame
 
 from game_logger import GameLogger
 from config import SettingsConfig
+from assets import AssetRegistry
+from replay import SeedRegistry
+
+def get_background_image_key() -> Tuple[str, int, str]:
+    """
+    (path, resolution, color mode) of the puzzle 1 background for the current settings
+    """
+    settings = SettingsConfig()
+    cb = "bw" if settings.grayscale_mode else "color"
+    return f"assets/backgrounds/puzzle_1/pz1_{cb}_{settings.screen_height}p.png", settings.screen_height, cb
 
 class GameMapPuzzle1:
 
-    def __init__(self, screen, player):
+    def __init__(self, screen, player, snapshot: Dict | None = None):
         """
         Map class for Game 1
+        Pass a snapshot() to pick up where it left off instead of generating new hitboxes
         """
         self.__settings = SettingsConfig()
         self.visibility = True
-        self.__cb = "color"
-        if self.__settings.grayscale_mode:
-            self.__cb = "bw"
-        self.image_path = f"assets/backgrounds/puzzle_1/pz1_{self.__cb}_{self.__settings.screen_height}p.png"
-        self.image = pygame.image.load(self.image_path)
-        self.map_surface = pygame.Surface(self.image.get_size(), flags=pygame.HWSURFACE)
-        self.map_surface.blit(self.image, (0, 0))
+        self.image_path, resolution, self.__cb = get_background_image_key()
+        # Cached and shared across every puzzle 1 load, already in the display format
+        self.image = AssetRegistry().get_image(self.image_path, resolution=resolution, color_mode=self.__cb)
+        self.map_surface = self.image
         self.screen = screen
         self.player = player
-        self.hitbox_generator = PuzzleHitboxGenerator1(self.screen, self.__settings.puzzle_1_difficulty)
+        self.hitbox_generator = PuzzleHitboxGenerator1(self.screen, self.__settings.puzzle_1_difficulty, hitboxes=None if snapshot is None else snapshot["hitboxes"])
+        if snapshot is not None:
+            self.player.position = list(snapshot["player_position"])
         self.draw_hitboxes()
 
     def draw_map(self):
@@ -33,6 +43,22 @@ class GameMapPuzzle1:
         if self.visibility:
             self.screen.blit(self.map_surface, (0, 0))
 
+    def snapshot(self) -> Dict:
+        """
+        The puzzle's state as plain values, see restore()
+        """
+        return {
+            "player_position": list(self.player.position),
+            "hitboxes": self.hitbox_generator.snapshot()
+        }
+
+    def restore(self, snapshot: Dict):
+        """
+        Put the puzzle (and its player) back the way snapshot() found it
+        """
+        self.player.position = list(snapshot["player_position"])
+        self.hitbox_generator.restore(snapshot["hitboxes"])
+
     def all_hitboxes_collided(self):
         """
         Check if all hitboxes are currently collided
@@ -61,7 +87,7 @@ class PlayerPuzzle1:
         self.__settings = SettingsConfig()
         self.visibility = True
         self.position = start_pos
-        self.speed = self.__settings.puzzle_1_difficulty_speed*self.__settings.screen_size_speed_multiplier
+        self.speed = self.__settings.values.player_speed
 
     def move(self, direction):
         """
@@ -96,18 +122,20 @@ class PuzzleHitbox1:
         """
         Puzzle Hitbox
         """
-        self.__settings = SettingsConfig()
+        self.__settings = SettingsConfig().values # Read once, hitboxes are rebuilt when the settings change
         self.visibility = True
         self.collidability = False
         self.position = pos
         self.color = (25, 0, 252)
         self.original_color = (25, 0, 252)
+        self.collided_color = (0, 231, 252)
         self.width = 40
         if self.__settings.grayscale_mode:
             self.color = (41, 41, 41)
             self.original_color = (41, 41, 41)
+            self.collided_color = (222, 220, 220)
         self.collision_time = None
-        self.collision_duration= self.__settings.puzzle_1_difficulty_mult*self.__settings.puzzle_1_difficulty # milliseconds
+        self.collision_duration = self.__settings.puzzle_1_collision_duration # milliseconds
         self.is_currently_collided = False
         self.__logger = GameLogger()
 
@@ -119,6 +147,54 @@ class PuzzleHitbox1:
         self.draw(screen, self.color)
         pygame.display.flip()
 
+    def snapshot(self) -> Dict:
+        """
+        The hitbox's state as plain values, the collision timer is saved as time elapsed so it survives a restart
+        """
+        elapsed = None
+        if self.collision_time is not None:
+            elapsed = pygame.time.get_ticks() - self.collision_time
+        return {
+            "position": list(self.position),
+            "color": self.__get_color_name(),
+            "is_currently_collided": self.is_currently_collided,
+            "collision_elapsed": elapsed
+        }
+
+    def restore(self, snapshot: Dict):
+        """
+        Put the hitbox back the way snapshot() found it
+        """
+        self.position = list(snapshot["position"])
+        self.color = self.__get_named_color(snapshot["color"])
+        self.is_currently_collided = snapshot["is_currently_collided"]
+        self.collision_time = None
+        if snapshot["collision_elapsed"] is not None:
+            self.collision_time = pygame.time.get_ticks() - snapshot["collision_elapsed"]
+
+    def __get_color_name(self) -> str | List[int]:
+        """
+        The current color as "original" or "collided", so a restore uses the palette of the settings it is restored under
+        Anything else (the found green) isn't palette dependent and is saved as is
+        """
+        if self.color == self.original_color:
+            return "original"
+        if self.color == self.collided_color:
+            return "collided"
+        return list(self.color)
+
+    def __get_named_color(self, color: str | List[int]) -> Tuple[int, int, int]:
+        """
+        Undo __get_color_name
+        """
+        match color:
+            case "original":
+                return self.original_color
+            case "collided":
+                return self.collided_color
+            case _:
+                return tuple(color)
+
     def check_collision(self, screen, player: PlayerPuzzle1):
         """
         Check if player collides with hitbox
@@ -132,12 +208,9 @@ class PuzzleHitbox1:
 
                 # Collision detected, update color and record collision time
                 self.collision_time = pygame.time.get_ticks()
-                if self.__settings.grayscale_mode:
-                    self.update_color(screen, (222, 220, 220))
-                else:
-                    self.update_color(screen, (0, 231, 252))
+                self.update_color(screen, self.collided_color)
                 if self.is_currently_collided is False:
-                    self.__logger.debug("Collision detected", f"PuzzleHitbox1[(x: {self.position[0]}, y: {self.position[1]})]")
+                    self.__logger.debug("Collision detected at (x: %s, y: %s)", self.position[0], self.position[1], name="PuzzleHitbox1", every=0.5)
                 self.is_currently_collided = True
                 return True
         return False
@@ -155,10 +228,7 @@ class PuzzleHitbox1:
                     self.collision_time = None
                     self.is_currently_collided = False
                 else:
-                    if self.__settings.grayscale_mode:
-                        color = (222, 220, 220)
-                    else:
-                        color = (0, 231, 252)
+                    color = self.collided_color
             # Use the current color if a specific color is not provided
             final_color = self.color if color is None else color
             pygame.draw.circle(screen, (0, 0, 0), self.position, self.width)
@@ -178,9 +248,10 @@ class PuzzleHitbox1:
 
 class PuzzleHitboxGenerator1:
 
-    def __init__(self, screen, num_hitboxes: int):
+    def __init__(self, screen, num_hitboxes: int, hitboxes: List[Dict] | None = None):
         """
         Puzzle Hitbox Generator
+        If hitboxes (from snapshot()) are given they are restored instead of generating new ones
         """
         self.__settings = SettingsConfig()
         self.already_drawn = False
@@ -190,7 +261,10 @@ class PuzzleHitboxGenerator1:
         self.screen = screen
         self.num_hitboxes = num_hitboxes
         # Keep above
-        self.create_hitboxes()
+        if hitboxes is None:
+            self.create_hitboxes()
+        else:
+            self.restore(hitboxes)
         # Keep below
         self.already_drawn = True
         if self.already_drawn:
@@ -207,6 +281,23 @@ class PuzzleHitboxGenerator1:
                 return True
         return False
 
+    def snapshot(self) -> List[Dict]:
+        """
+        Every hitbox's state as plain values
+        """
+        return [hitbox.snapshot() for hitbox in self.hitboxes]
+
+    def restore(self, hitboxes: List[Dict]):
+        """
+        Replace the hitboxes with the ones from snapshot(), nothing is generated
+        """
+        self.hitboxes = []
+        for hitbox_snapshot in hitboxes:
+            hitbox = PuzzleHitbox1(list(hitbox_snapshot["position"]))
+            hitbox.restore(hitbox_snapshot)
+            hitbox.set_collidability(self.collidability)
+            self.hitboxes.append(hitbox)
+
     def set_collidability(self, collidability: bool):
         """
         Set hitbox collidability
@@ -259,14 +350,15 @@ class PuzzleHitboxGenerator1:
         """
         Create hitboxes that do not leave bounds of screen!
         """
-        player_speed = self.__settings.puzzle_1_difficulty_speed*self.__settings.screen_size_speed_multiplier
+        player_speed = self.__settings.values.player_speed
         screen_width, screen_height = self.__settings.screen_width, self.__settings.screen_height
         hitbox_radius = 40  # Hitboxes are a cicle with r=40
         padding = 100  # Minimum space between hitboxes and screen edge
+        rng = SeedRegistry().get_rng("puzzle_1_hitboxes")
         for _ in range(self.num_hitboxes):
             while True:
-                x = random.randint(hitbox_radius, screen_width - hitbox_radius)
-                y = random.randint(hitbox_radius, screen_height - hitbox_radius)
+                x = rng.randint(hitbox_radius, screen_width - hitbox_radius)
+                y = rng.randint(hitbox_radius, screen_height - hitbox_radius)
                 new_hitbox = PuzzleHitbox1([x, y])
                 fitts_law_passes = True
                 if len(self.hitboxes) > 0:
@@ -1,10 +1,12 @@
 import random
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 import pygame
 
 from game_logger import GameLogger
 from config import SettingsConfig
+from assets import AssetRegistry
+from replay import SeedRegistry
 
 def get_intrusive_thoughts_list():
     """
@@ -26,29 +28,37 @@ def get_intrusive_thoughts_list():
         "Why did I forget to take out the trash yesterday?"
     ]
 
-def get_intrusive_thoughts():
+def get_intrusive_thoughts(rng: random.Random | None = None):
     """
     Get a random intrusive thought
     """
-    return random.choice(get_intrusive_thoughts_list())
+    if rng is None:
+        rng = random
+    return rng.choice(get_intrusive_thoughts_list())
+
+def get_background_image_key() -> Tuple[str, int, str]:
+    """
+    (path, resolution, color mode) of the puzzle 2 background for the current settings
+    """
+    settings = SettingsConfig()
+    cb = "bw" if settings.grayscale_mode else "color"
+    return f"assets/backgrounds/puzzle_2/pz2_{cb}_{settings.screen_height}p.png", settings.screen_height, cb
 
 class GameMapPuzzle2:
 
-    def __init__(self, screen):
+    def __init__(self, screen, snapshot: Dict | None = None):
         """
         Map class for Game 1
+        Pass a snapshot() to pick up where it left off instead of generating new hitboxes
         """
         self.__settings = SettingsConfig()
         self.visibility = True
-        self.__cb = "color"
-        if self.__settings.grayscale_mode:
-            self.__cb = "bw"
-        self.image_path = f"assets/backgrounds/puzzle_2/pz2_{self.__cb}_{self.__settings.screen_height}p.png"
-        self.image = pygame.image.load(self.image_path)
-        self.map_surface = pygame.Surface(self.image.get_size(), flags=pygame.HWSURFACE)
-        self.map_surface.blit(self.image, (0, 0))
+        self.image_path, resolution, self.__cb = get_background_image_key()
+        # Cached and shared across every puzzle 2 load, already in the display format
+        self.image = AssetRegistry().get_image(self.image_path, resolution=resolution, color_mode=self.__cb)
+        self.map_surface = self.image
         self.screen = screen
-        self.hitbox_generator = PuzzleHitboxGenerator2(self.screen, self.__settings.puzzle_2_difficulty_number)
+        self.hitbox_generator = PuzzleHitboxGenerator2(self.screen, self.__settings.puzzle_2_difficulty_number, hitboxes=None if snapshot is None else snapshot["hitboxes"])
         self.draw_hitboxes()
 
     def draw_map(self):
@@ -58,6 +68,18 @@ class GameMapPuzzle2:
         if self.visibility:
             self.screen.blit(self.map_surface, (0, 0))
 
+    def snapshot(self) -> Dict:
+        """
+        The puzzle's state as plain values, see restore()
+        """
+        return {"hitboxes": self.hitbox_generator.snapshot()}
+
+    def restore(self, snapshot: Dict):
+        """
+        Put the puzzle back the way snapshot() found it
+        """
+        self.hitbox_generator.restore(snapshot["hitboxes"])
+
     def draw_message_box(self, text: str, screen):
         """
         Draw a static box in the top left corner with text
@@ -104,17 +126,19 @@ class PuzzleHitbox2:
         """
         Puzzle Hitbox
         """
-        self.__settings = SettingsConfig()
+        self.__settings = SettingsConfig().values # Read once, hitboxes are rebuilt when the settings change
         self.visibility = True
         self.clickability = False
         self.position = pos
         self.color = (191, 71, 119)
         self.original_color = (191, 71, 119)
+        self.clicked_color = (116, 56, 156)
         if self.__settings.grayscale_mode:
             self.color = (0, 0, 0)
             self.original_color = (0, 0, 0)
+            self.clicked_color = (255, 255, 255)
         self.click_time = None
-        self.click_duration= 870*self.__settings.puzzle_1_difficulty # milliseconds
+        self.click_duration = self.__settings.puzzle_2_click_duration # milliseconds
         self.is_currently_clicked = False
         self.text = text
         self.rect_size = (160, 80)
@@ -148,6 +172,60 @@ class PuzzleHitbox2:
         self.draw(screen, self.color)
         pygame.display.flip()
 
+    def snapshot(self) -> Dict:
+        """
+        The hitbox's state as plain values, the click timer is saved as time elapsed so it survives a restart
+        """
+        elapsed = None
+        if self.click_time is not None:
+            elapsed = pygame.time.get_ticks() - self.click_time
+        return {
+            "position": list(self.position),
+            "velocity": list(self.velocity),
+            "text": self.text,
+            "am_the_one": self.am_the_one,
+            "color": self.__get_color_name(),
+            "is_currently_clicked": self.is_currently_clicked,
+            "click_elapsed": elapsed
+        }
+
+    def restore(self, snapshot: Dict):
+        """
+        Put the hitbox back the way snapshot() found it
+        """
+        self.position = list(snapshot["position"])
+        self.velocity = list(snapshot["velocity"])
+        self.text = snapshot["text"]
+        self.am_the_one = snapshot["am_the_one"]
+        self.color = self.__get_named_color(snapshot["color"])
+        self.is_currently_clicked = snapshot["is_currently_clicked"]
+        self.click_time = None
+        if snapshot["click_elapsed"] is not None:
+            self.click_time = pygame.time.get_ticks() - snapshot["click_elapsed"]
+
+    def __get_color_name(self) -> str | List[int]:
+        """
+        The current color as "original" or "clicked", so a restore uses the palette of the settings it is restored under
+        Anything else (the found green) isn't palette dependent and is saved as is
+        """
+        if self.color == self.original_color:
+            return "original"
+        if self.color == self.clicked_color:
+            return "clicked"
+        return list(self.color)
+
+    def __get_named_color(self, color: str | List[int]) -> Tuple[int, int, int]:
+        """
+        Undo __get_color_name
+        """
+        match color:
+            case "original":
+                return self.original_color
+            case "clicked":
+                return self.clicked_color
+            case _:
+                return tuple(color)
+
     def check_click(self, screen, mouse_pos: Tuple[int, int]):
         """
         Check if the hitbox is clicked
@@ -163,12 +241,9 @@ class PuzzleHitbox2:
                 current_time = pygame.time.get_ticks()
                 self.click_time = current_time
                 if not self.am_the_one:  # Only change color if it's not "the one"
-                    if self.__settings.grayscale_mode:
-                        self.update_color(screen, (255, 255, 255))
-                    else:
-                        self.update_color(screen, (116, 56, 156))
+                    self.update_color(screen, self.clicked_color)
                 self.is_currently_clicked = True
-                self.__logger.debug("Click detected", f"PuzzleHitbox2[(x: {self.position[0]}, y: {self.position[1]})]")
+                self.__logger.debug("Click detected at (x: %s, y: %s)", self.position[0], self.position[1], name="PuzzleHitbox2", every=0.5)
                 return True
         return False
 
@@ -184,10 +259,7 @@ class PuzzleHitbox2:
                     self.click_time = None
                     self.is_currently_clicked = False
                 else:
-                    if self.__settings.grayscale_mode:
-                        color = (255, 255, 255)
-                    else:
-                        color = (116, 56, 156)
+                    color = self.clicked_color
             font = pygame.font.Font(None, self.font_size)
             if color is (255, 255, 255):
                 text_surface = font.render(self.text, True, (0, 0, 0))
@@ -221,9 +293,10 @@ class PuzzleHitbox2:
 
 class PuzzleHitboxGenerator2:
 
-    def __init__(self, screen, num_hitboxes: int):
+    def __init__(self, screen, num_hitboxes: int, hitboxes: List[Dict] | None = None):
         """
         Puzzle Hitbox Generator
+        If hitboxes (from snapshot()) are given they are restored instead of generating new ones
         """
         self.__settings = SettingsConfig()
         self.already_drawn = False
@@ -232,12 +305,32 @@ class PuzzleHitboxGenerator2:
         self.hitboxes = []
         self.screen = screen
         self.num_hitboxes = num_hitboxes
-        self.create_hitboxes()
+        if hitboxes is None:
+            self.create_hitboxes()
+        else:
+            self.restore(hitboxes)
         self.already_drawn = True
         if self.already_drawn:
             self.draw()
         self.draw()
 
+    def snapshot(self) -> List[Dict]:
+        """
+        Every hitbox's state as plain values
+        """
+        return [hitbox.snapshot() for hitbox in self.hitboxes]
+
+    def restore(self, hitboxes: List[Dict]):
+        """
+        Replace the hitboxes with the ones from snapshot(), nothing is generated
+        """
+        self.hitboxes = []
+        for hitbox_snapshot in hitboxes:
+            hitbox = PuzzleHitbox2(list(hitbox_snapshot["position"]), hitbox_snapshot["text"])
+            hitbox.restore(hitbox_snapshot)
+            hitbox.set_clickability(self.clickability)
+            self.hitboxes.append(hitbox)
+
     def check_click(self, mouse_pos: Tuple[int, int]):
         """
         Check if any hitbox is clicked
@@ -285,25 +378,26 @@ class PuzzleHitboxGenerator2:
         hitbox_radius = 40  # Hitboxes are a circle with r=40
         padding = 100  # Minimum space between hitboxes and screen edge
         speed_multiplier = self.__settings.puzzle_2_difficulty_speed
+        rng = SeedRegistry().get_rng("puzzle_2_hitboxes")
 
         for _ in range(self.num_hitboxes):
             while True:
-                x = random.randint(hitbox_radius, screen_width - hitbox_radius)
-                y = random.randint(hitbox_radius, screen_height - hitbox_radius)
-                random_thought = get_intrusive_thoughts()
+                x = rng.randint(hitbox_radius, screen_width - hitbox_radius)
+                y = rng.randint(hitbox_radius, screen_height - hitbox_radius)
+                random_thought = get_intrusive_thoughts(rng)
                 new_hitbox = PuzzleHitbox2([x, y], random_thought)
 
                 # Randomized velocity with a speed multiplier
                 new_hitbox.velocity = [
-                    random.choice([-2, -1, 1, 2]) * speed_multiplier,
-                    random.choice([-2, -1, 1, 2]) * speed_multiplier
+                    rng.choice([-2, -1, 1, 2]) * speed_multiplier,
+                    rng.choice([-2, -1, 1, 2]) * speed_multiplier
                 ]
 
                 if not self.hitbox_overlap(new_hitbox, hitbox_radius + padding):
                     self.hitboxes.append(new_hitbox)
                     break
         if self.hitboxes:
-            chosen_one = random.choice(self.hitboxes)
+            chosen_one = rng.choice(self.hitboxes)
             chosen_one.am_the_one = True
             chosen_one.text = "Dr. Best"
 
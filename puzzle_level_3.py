@@ -1,67 +1,78 @@
-import random
-from typing import Set, Tuple, List
+import queue, random, threading
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
 
 import pygame
 
 from game_logger import GameLogger
 from config import SettingsConfig
+from replay import SeedRegistry
+from maze_generation import get_generator
+
+# Below this many pixels per cell the maze no longer fits the screen legibly and is drawn through a scrolling camera instead
+MIN_FIT_BLOCK_SIZE = 8
+# Rough on-screen size of one cached chunk of a large maze
+LARGE_MAZE_CHUNK_PIXELS = 512
 
 class Maze:
 
-    def __init__(self) -> None:
+    def __init__(self, seed: int | None = None, snapshot: Dict | None = None) -> None:
         """
         Initialize the Maze with a given size
+        Cells are stored row-major in a bytearray (1 = open, 0 = wall), one byte per cell
+        Pass a snapshot() to get that maze back without generating it again
+        NOTE: Safe to construct off the main thread as long as a seed is passed in
         """
         self.__glogger = GameLogger()
         self.__settings = SettingsConfig()
+        self.__rendered = None # (block_size, surface) of the last render, the maze never changes after generation
+        self.__chunks = OrderedDict() # (chunk_x, chunk_y, block_size) -> surface, least recently used first
+        self.max_cached_chunks = 64
+        if snapshot is not None:
+            self.size = snapshot["size"]
+            self.algorithm = snapshot["algorithm"]
+            self.seed = snapshot["seed"]
+            self.cells = bytearray(snapshot["cells"])
+            self.exit_point = (self.size - 1, self.size - 1)
+            return
         self.size = self.__settings.puzzle_3_difficulty_size
-        self.maze = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        self.algorithm = self.__settings.puzzle_3_algorithm
+        if seed is None:
+            seed = SeedRegistry().next_seed("puzzle_3_maze")
+        self.seed = seed
+        self.cells = bytearray(self.size * self.size)
         self.exit_point = (self.size - 1, self.size - 1)
         self.generate_maze(0, 0)
         #self.print_maze()
 
-    def generate_maze(self, cx: int, cy: int, visited: Set[Tuple[int, int]] = None) -> None:
-        """
-        Recursively generate the maze starting from (cx, cy)
-        """
-        self.maze = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        stack: List[Tuple[int, int]] = []
-        visited: Set[Tuple[int, int]] = set()
-        stack.append((cx, cy))
-        visited.add((cx, cy))
-        while stack:
-            cx, cy = stack[-1]
-            self.maze[cy][cx] = 1
-            neighbors = self.get_unvisited_neighbors(cx, cy, visited)
-            if neighbors:
-                nx, ny = random.choice(neighbors)
-                self.remove_wall(cx, cy, nx, ny)
-                visited.add((nx, ny))
-                stack.append((nx, ny))
-            else:
-                stack.pop()
-        self.maze[self.size - 1][self.size - 2] = 1
-        self.maze[self.size - 2][self.size - 1] = 1
-        self.maze[self.exit_point[1]][self.exit_point[0]] = 1
-
-    def get_unvisited_neighbors(self, x: int, y: int, visited: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
-        """
-        Get all unvisited neighbors of a cell
-        """
-        neighbors = []
-        for dx, dy in [(0, -2), (-2, 0), (0, 2), (2, 0)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.size and 0 <= ny < self.size and (nx, ny) not in visited:
-                neighbors.append((nx, ny))
-        return neighbors
-
-    def remove_wall(self, x1: int, y1: int, x2: int, y2: int) -> None:
-        """
-        Remove the wall between two cells
-        """
-        wx = (x1 + x2) // 2
-        wy = (y1 + y2) // 2
-        self.maze[wy][wx] = 1
+    def generate_maze(self, cx: int, cy: int, visited: Set[Tuple[int, int]] = None) -> None: # pylint: disable=unused-argument
+        """
+        Generate the maze with the configured algorithm (see maze_generation), the DFS backtracker starts from (cx, cy)
+        """
+        rng = random.Random(self.seed)
+        self.cells = get_generator(self.algorithm).generate(self.size, rng, (cx, cy))
+        self.cells[(self.size - 1) * self.size + self.size - 2] = 1
+        self.cells[(self.size - 2) * self.size + self.size - 1] = 1
+        self.cells[self.exit_point[1] * self.size + self.exit_point[0]] = 1
+        self.__rendered = None
+        self.__chunks.clear()
+
+    def snapshot(self) -> Dict:
+        """
+        The generated maze as plain values, the cells go in as raw bytes
+        """
+        return {
+            "size": self.size,
+            "algorithm": self.algorithm,
+            "seed": self.seed,
+            "cells": bytes(self.cells)
+        }
+
+    def is_open(self, x: int, y: int) -> bool:
+        """
+        Is the cell at (x, y) open (not a wall)
+        """
+        return self.cells[y * self.size + x] == 1
 
     def cell_is_valid(self, x: int, y: int, visited: set) -> bool:
         """
@@ -78,21 +89,101 @@ class Maze:
         """
         Debug Print the maze data
         """
-        for row in self.maze:
+        for y in range(self.size):
+            row = self.cells[y * self.size:(y + 1) * self.size]
             self.__glogger.debug(' '.join(str(x) for x in row), name=__name__)
 
+    def get_block_size(self) -> int:
+        """
+        Size in pixels of one cell when the whole maze is fit to the screen
+        """
+        if self.size == self.__settings.values.puzzle_3_difficulty_size:
+            return self.__settings.values.maze_block_size # Worked out once per settings load
+        return min(self.__settings.screen_width // self.size, self.__settings.screen_height // self.size)
+
+    def is_large(self) -> bool:
+        """
+        Is the maze too big to fit on screen, meaning it has to be drawn through a camera
+        """
+        return self.get_block_size() < MIN_FIT_BLOCK_SIZE
+
+    def get_large_block_size(self) -> int:
+        """
+        Size in pixels of one cell when the maze is drawn through a camera
+        """
+        return max(MIN_FIT_BLOCK_SIZE, self.__settings.screen_height // 90)
+
+    def get_chunk_cells(self, block_size: int) -> int:
+        """
+        Width (and height) in cells of one cached chunk at the given block size
+        """
+        return max(8, LARGE_MAZE_CHUNK_PIXELS // block_size)
+
+    def draw_cell(self, surface: pygame.Surface, x: int, y: int, block_size: int) -> None:
+        """
+        Draw a single cell of the maze
+        """
+        if (x, y) == self.exit_point:
+            color = (0, 255, 0)
+        else:
+            color = (255, 255, 255) if self.is_open(x, y) else (0, 0, 0)
+        surface.fill(color, (x * block_size, y * block_size, block_size, block_size))
+
+    def draw_region(self, surface: pygame.Surface, x0: int, y0: int, x1: int, y1: int, block_size: int) -> None:
+        """
+        Draw the cells in [x0, x1) x [y0, y1) onto a black surface whose top left is cell (x0, y0)
+        Horizontal runs of open cells are filled with one rect each
+        """
+        for y in range(y0, y1):
+            row = self.cells[y * self.size + x0:y * self.size + x1]
+            top = (y - y0) * block_size
+            run_start = row.find(1)
+            while run_start != -1:
+                run_end = row.find(0, run_start)
+                if run_end == -1:
+                    run_end = len(row)
+                surface.fill((255, 255, 255), (run_start * block_size, top, (run_end - run_start) * block_size, block_size))
+                run_start = row.find(1, run_end)
+        exit_x, exit_y = self.exit_point
+        if x0 <= exit_x < x1 and y0 <= exit_y < y1:
+            surface.fill((0, 255, 0), ((exit_x - x0) * block_size, (exit_y - y0) * block_size, block_size, block_size))
+
+    def render(self, block_size: int) -> pygame.Surface:
+        """
+        Rasterize the whole maze once at the given block size, later calls return the cached surface
+        """
+        if self.__rendered is None or self.__rendered[0] != block_size:
+            surface = pygame.Surface((self.size * block_size, self.size * block_size))
+            surface.fill((0, 0, 0))
+            self.draw_region(surface, 0, 0, self.size, self.size, block_size)
+            self.__rendered = (block_size, surface)
+        return self.__rendered[1]
+
+    def render_chunk(self, chunk_x: int, chunk_y: int, block_size: int) -> pygame.Surface:
+        """
+        Rasterize one chunk of a large maze, chunks are cached and the least recently used are evicted
+        """
+        key = (chunk_x, chunk_y, block_size)
+        surface = self.__chunks.get(key)
+        if surface is not None:
+            self.__chunks.move_to_end(key)
+            return surface
+        chunk_cells = self.get_chunk_cells(block_size)
+        x0, y0 = chunk_x * chunk_cells, chunk_y * chunk_cells
+        x1, y1 = min(x0 + chunk_cells, self.size), min(y0 + chunk_cells, self.size)
+        surface = pygame.Surface(((x1 - x0) * block_size, (y1 - y0) * block_size))
+        surface.fill((0, 0, 0))
+        self.draw_region(surface, x0, y0, x1, y1, block_size)
+        self.__chunks[key] = surface
+        while len(self.__chunks) > self.max_cached_chunks:
+            self.__chunks.popitem(last=False)
+        return surface
+
     def draw(self, screen: pygame.Surface) -> None:
         """
         Draw the maze on the Pygame screen
         """
-        block_size = min(self.__settings.screen_width // self.size, self.__settings.screen_height // self.size)
-        for y in range(self.size):
-            for x in range(self.size):
-                if (x, y) == self.exit_point:
-                    color = (0, 255, 0)
-                else:
-                    color = (255, 255, 255) if self.maze[y][x] == 1 else (0, 0, 0)
-                pygame.draw.rect(screen, color, (x * block_size, y * block_size, block_size, block_size))
+        screen.blit(self.render(self.get_block_size()), (0, 0))
 
 class MazePlayer:
 
@@ -106,6 +197,19 @@ class MazePlayer:
         self.speed = 1
         self.__exit_triggered = False
 
+    def snapshot(self) -> Dict:
+        """
+        The player's state as plain values
+        """
+        return {"position": list(self.position), "exit_triggered": self.__exit_triggered}
+
+    def restore(self, snapshot: Dict) -> None:
+        """
+        Put the player back the way snapshot() found it
+        """
+        self.position = tuple(snapshot["position"])
+        self.__exit_triggered = snapshot["exit_triggered"]
+
     def has_exit_been_triggered(self) -> bool:
         """
         Check if the player has reached the exit
@@ -139,7 +243,7 @@ class MazePlayer:
         Check if the new position is within bounds and not a wall
         """
         if 0 <= x < self.maze.size and 0 <= y < self.maze.size:
-            if (x, y) == self.maze.exit_point or self.maze.maze[y][x] == 1:
+            if (x, y) == self.maze.exit_point or self.maze.is_open(x, y):
                 return True
         return False
 
@@ -157,21 +261,198 @@ class MazeGame:
         Initialize the maze game with player and maze objects
         """
         self.__glogger = GameLogger() # pylint: disable=unused-private-member
-        self.__settings = SettingsConfig()
+        self.__settings = SettingsConfig() # pylint: disable=unused-private-member
         self.screen = screen
         self.player = player
         self.maze = maze
+        self.large_mode = self.maze.is_large()
+        if self.large_mode:
+            self.block_size = self.maze.get_large_block_size()
+            self.__fit_chunk_cache_to_screen()
+        else:
+            self.block_size = self.maze.get_block_size()
+        self.__frame_surface = None # Pre-rendered maze with the player painted in, patched cell by cell as the player moves
 
     def update(self, direction: str) -> None:
         """
         Update the game state by moving the player
         """
+        old_position = self.player.position
         self.player.move(direction)
+        if self.__frame_surface is not None and self.player.position != old_position:
+            self.maze.draw_cell(self.__frame_surface, old_position[0], old_position[1], self.block_size)
+            self.player.draw(self.__frame_surface, self.block_size)
+
+    def snapshot(self) -> Dict:
+        """
+        The maze and the player's place in it as plain values
+        """
+        return {"maze": self.maze.snapshot(), "player": self.player.snapshot()}
+
+    def restore(self, snapshot: Dict) -> None:
+        """
+        Put the player back the way snapshot() found it, only for the same maze (see MazeGame.is_same_maze)
+        """
+        self.player.restore(snapshot["player"])
+        self.invalidate()
+
+    def is_same_maze(self, snapshot: Dict) -> bool:
+        """
+        Is this game's maze the one in the snapshot, so restore() can keep it
+        """
+        maze_snapshot = snapshot["maze"]
+        return self.maze.seed == maze_snapshot["seed"] and self.maze.size == maze_snapshot["size"] and self.maze.algorithm == maze_snapshot["algorithm"]
+
+    def invalidate(self) -> None:
+        """
+        Throw away the pre-rendered frame, for when the player or maze changed outside of update()
+        """
+        self.__frame_surface = None
+
+    def __fit_chunk_cache_to_screen(self) -> None:
+        """
+        Keep roughly two screens worth of chunks cached so walking back and forth never re-renders
+        """
+        chunk_pixels = self.maze.get_chunk_cells(self.block_size) * self.block_size
+        chunks_across = self.screen.get_width() // chunk_pixels + 2
+        chunks_down = self.screen.get_height() // chunk_pixels + 2
+        self.maze.max_cached_chunks = chunks_across * chunks_down * 2
+
+    def get_camera_offset(self) -> Tuple[int, int]:
+        """
+        Top left pixel of the maze that is visible, centered on the player and clamped to the maze
+        """
+        maze_pixels = self.maze.size * self.block_size
+        half_block = self.block_size // 2
+        camera_x = self.player.position[0] * self.block_size + half_block - self.screen.get_width() // 2
+        camera_y = self.player.position[1] * self.block_size + half_block - self.screen.get_height() // 2
+        camera_x = max(0, min(camera_x, maze_pixels - self.screen.get_width()))
+        camera_y = max(0, min(camera_y, maze_pixels - self.screen.get_height()))
+        return (camera_x, camera_y)
+
+    def draw_viewport(self) -> None:
+        """
+        Draw only the chunks of a large maze that are on screen, then the player
+        """
+        camera_x, camera_y = self.get_camera_offset()
+        chunk_pixels = self.maze.get_chunk_cells(self.block_size) * self.block_size
+        last_chunk = (self.maze.size * self.block_size - 1) // chunk_pixels
+        first_chunk_x, first_chunk_y = camera_x // chunk_pixels, camera_y // chunk_pixels
+        last_chunk_x = min(last_chunk, (camera_x + self.screen.get_width() - 1) // chunk_pixels)
+        last_chunk_y = min(last_chunk, (camera_y + self.screen.get_height() - 1) // chunk_pixels)
+        for chunk_y in range(first_chunk_y, last_chunk_y + 1):
+            for chunk_x in range(first_chunk_x, last_chunk_x + 1):
+                chunk = self.maze.render_chunk(chunk_x, chunk_y, self.block_size)
+                self.screen.blit(chunk, (chunk_x * chunk_pixels - camera_x, chunk_y * chunk_pixels - camera_y))
+        player_rect = (self.player.position[0] * self.block_size - camera_x, self.player.position[1] * self.block_size - camera_y, self.block_size, self.block_size)
+        pygame.draw.rect(self.screen, (255, 0, 0), player_rect)
 
     def draw(self) -> None:
         """
         Draw the maze and the player.
         """
-        self.maze.draw(self.screen)
-        block_size = min(self.__settings.screen_width // self.maze.size, self.__settings.screen_height // self.maze.size)
-        self.player.draw(self.screen, block_size)
+        if self.large_mode:
+            self.draw_viewport()
+            return
+        if self.__frame_surface is None:
+            self.__frame_surface = self.maze.render(self.block_size).copy()
+            self.player.draw(self.__frame_surface, self.block_size)
+        self.screen.blit(self.__frame_surface, (0, 0))
+
+class MazePool:
+
+    def __init__(self, pool_size: int = 1) -> None:
+        """
+        Generates the next maze(s) on a worker thread so entering or resetting puzzle 3 never waits on generation
+        Seeds are drawn on the main thread when a maze is requested, so recordings still replay exactly
+        Every request is tagged with the settings generation it was made in, settings_changed() starts a new one
+        NOTE: The worker is a daemon thread, pure Python generation still shares the GIL with the main loop
+        """
+        self.__glogger = GameLogger()
+        self.pool_size = pool_size
+        self.__requests = queue.Queue() # (generation, seed)
+        self.__ready = queue.Queue() # (generation, maze or None if it failed)
+        # Only touched from the main thread (the worker just reads __generation), and only counting the current generation
+        self.__generation = 0
+        self.__in_flight = 0 # Requested but not back from the worker yet
+        self.__mazes: List[Maze] = [] # Back from the worker, waiting for take()
+        self.__worker = threading.Thread(target=self.__work, name="maze-pool", daemon=True)
+        self.__worker.start()
+
+    def __work(self) -> None:
+        """
+        Worker thread: generate and pre-render a maze for every requested seed, skipping requests from an older generation
+        """
+        while True:
+            generation, seed = self.__requests.get()
+            if generation != self.__generation:
+                continue
+            try:
+                maze = Maze(seed=seed)
+                if not maze.is_large():
+                    maze.render(maze.get_block_size())
+            except Exception as e:
+                self.__glogger.error("Failed to pre-generate a maze", name=__name__, exception=e)
+                maze = None
+            self.__ready.put((generation, maze))
+
+    def prefetch(self) -> None:
+        """
+        Top the pool back up to pool_size mazes
+        """
+        while self.__in_flight + len(self.__mazes) < self.pool_size:
+            self.__requests.put((self.__generation, SeedRegistry().next_seed("puzzle_3_maze")))
+            self.__in_flight += 1
+
+    def settings_changed(self) -> None:
+        """
+        The maze size or algorithm changed: forget every maze made or requested with the old settings
+        and start on as many new ones as were pooled, so the next take() doesn't have to generate on the spot
+        """
+        pooled = self.__in_flight + len(self.__mazes)
+        self.__generation += 1
+        self.__in_flight = 0
+        self.__mazes.clear()
+        for _ in range(pooled):
+            self.__requests.put((self.__generation, SeedRegistry().next_seed("puzzle_3_maze")))
+            self.__in_flight += 1
+
+    def has_ready(self) -> bool:
+        """
+        Is a pre-generated maze for the current settings waiting, so take() won't block
+        """
+        self.__collect()
+        return len(self.__mazes) > 0
+
+    def take(self) -> Maze:
+        """
+        Get the next maze, only generates on the spot if nothing was requested, then starts on the one after
+        """
+        self.__collect()
+        if not self.__mazes and self.__in_flight > 0:
+            self.__glogger.warning("Maze pool is still generating, waiting on it", name=__name__)
+            while not self.__mazes and self.__in_flight > 0:
+                self.__file(*self.__ready.get())
+        maze = self.__mazes.pop(0) if self.__mazes else Maze()
+        self.prefetch()
+        return maze
+
+    def __collect(self) -> None:
+        """
+        File every maze the worker has finished so far, without waiting
+        """
+        while True:
+            try:
+                self.__file(*self.__ready.get_nowait())
+            except queue.Empty:
+                return
+
+    def __file(self, generation: int, maze: Maze | None) -> None:
+        """
+        File one maze back from the worker, one from an older generation was already written off by settings_changed()
+        """
+        if generation != self.__generation:
+            return
+        self.__in_flight -= 1
+        if maze is not None:
+            self.__mazes.append(maze)
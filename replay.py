@@ -0,0 +1,209 @@
+import json, random
+from typing import Any, Dict, List
+
+import pygame
+
+from misc import Singleton
+
+REPLAY_FORMAT_VERSION = 2
+SUPPORTED_REPLAY_FORMAT_VERSIONS = {1, 2} # 1 has no starting save, it replays against a new one
+
+class SeedRegistry(metaclass=Singleton):
+
+    def __init__(self):
+        """
+        Hands out the RNG seeds used for generated content (hitboxes, mazes) so a run can be replayed exactly
+        Seeds are issued per named stream, in order, and remembered so they can be written into a recording
+        """
+        self.__seed_source = random.Random()
+        self.__issued_seeds: Dict[str, List[int]] = {}
+        self.__replay_seeds: Dict[str, List[int]] = {}
+
+    def reseed(self, seed: int):
+        """
+        Make every seed handed out from now on deterministic
+        """
+        self.__seed_source = random.Random(seed)
+
+    def next_seed(self, stream: str) -> int:
+        """
+        Get the next seed for a stream, replayed seeds take priority over fresh ones
+        """
+        replay_seeds = self.__replay_seeds.get(stream)
+        if replay_seeds:
+            seed = replay_seeds.pop(0)
+        else:
+            seed = self.__seed_source.getrandbits(32)
+        self.__issued_seeds.setdefault(stream, []).append(seed)
+        return seed
+
+    def get_rng(self, stream: str) -> random.Random:
+        """
+        Get a fresh random.Random seeded from the next seed of a stream
+        """
+        return random.Random(self.next_seed(stream))
+
+    def get_issued_seeds(self) -> Dict[str, List[int]]:
+        """
+        Every seed handed out so far, per stream
+        """
+        return {stream: list(seeds) for stream, seeds in self.__issued_seeds.items()}
+
+    def load_replay_seeds(self, seeds: Dict[str, List[int]]):
+        """
+        Queue up recorded seeds to be handed out again, in the same order
+        """
+        self.__replay_seeds = {stream: list(stream_seeds) for stream, stream_seeds in seeds.items()}
+
+class PressedKeys:
+
+    def __init__(self, pressed_keys: List[int]):
+        """
+        Stand-in for pygame.key.get_pressed() during a replay, indexable by pygame key constants
+        """
+        self.__pressed_keys = frozenset(pressed_keys)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.__pressed_keys
+
+class GameInput(metaclass=Singleton):
+
+    def __init__(self):
+        """
+        Per-frame input for InstanceMain.main_game_loop
+        Live by default, can also record every frame to a file or play a recording back frame-exactly
+        """
+        self.__mode = "live"
+        self.__path = None
+        self.__frames: List[list] = []
+        self.__frame_index = 0
+        self.__events = []
+        self.__pressed = None
+        self.__mouse_pos = (0, 0)
+        self.__start_save = None # The save the recording started from, see save.encode_recorded_save
+        self.__tracked_keys = sorted({getattr(pygame, name) for name in dir(pygame) if name.startswith("K_")})
+
+    @property
+    def mode(self) -> str:
+        """
+        "live", "record" or "replay"
+        """
+        return self.__mode
+
+    def start_recording(self, path: str):
+        """
+        Record every frame from now on, written to path by save_recording()
+        """
+        self.__mode = "record"
+        self.__path = path
+        self.__frames = []
+
+    def start_replay(self, path: str) -> Dict[str, Any]:
+        """
+        Load a recording and play it back instead of reading live input
+        Returns the settings the recording was made with so the caller can apply them
+        """
+        with open(path, 'r') as replay_file:
+            recording = json.load(replay_file)
+        if recording.get("version") not in SUPPORTED_REPLAY_FORMAT_VERSIONS:
+            raise ValueError(f"Unsupported replay version {recording.get('version')} in {path}")
+        self.__mode = "replay"
+        self.__path = path
+        self.__frames = recording["frames"]
+        self.__frame_index = 0
+        self.__start_save = recording.get("save")
+        SeedRegistry().load_replay_seeds(recording["seeds"])
+        return recording.get("settings", {})
+
+    def get_start_save(self) -> str | None:
+        """
+        The save a recording starts from (encoded), None if there is none (live, or an old recording)
+        """
+        return self.__start_save
+
+    def set_start_save(self, start_save: str):
+        """
+        Set the save this recording starts from, it is written into the recording
+        """
+        self.__start_save = start_save
+
+    def begin_frame(self) -> bool:
+        """
+        Capture (or replay) this frame's input, call once at the top of every frame
+        Returns False once a replay has run out of frames
+        """
+        if self.__mode == "replay":
+            if self.__frame_index >= len(self.__frames):
+                return False
+            events, pressed_keys, mouse_pos = self.__frames[self.__frame_index]
+            self.__frame_index += 1
+            self.__events = [self.__deserialize_event(event) for event in events]
+            self.__pressed = PressedKeys(pressed_keys)
+            self.__mouse_pos = tuple(mouse_pos)
+            return True
+        self.__events = pygame.event.get()
+        self.__pressed = pygame.key.get_pressed()
+        self.__mouse_pos = pygame.mouse.get_pos()
+        if self.__mode == "record":
+            self.__frames.append([
+                [self.__serialize_event(event) for event in self.__events],
+                [key for key in self.__tracked_keys if self.__pressed[key]],
+                list(self.__mouse_pos)
+            ])
+        return True
+
+    def get_events(self) -> list:
+        """
+        This frame's events, what pygame.event.get() returned
+        """
+        return self.__events
+
+    def get_pressed(self):
+        """
+        This frame's keyboard state, what pygame.key.get_pressed() returned
+        """
+        if self.__pressed is None:
+            return pygame.key.get_pressed()
+        return self.__pressed
+
+    def get_mouse_pos(self):
+        """
+        This frame's mouse position, what pygame.mouse.get_pos() returned
+        """
+        return self.__mouse_pos
+
+    def save_recording(self, settings: Dict[str, Any] | None = None):
+        """
+        Write the recording to disk, does nothing unless recording
+        """
+        if self.__mode != "record":
+            return
+        recording = {
+            "version": REPLAY_FORMAT_VERSION,
+            "settings": settings or {},
+            "seeds": SeedRegistry().get_issued_seeds(),
+            "save": self.__start_save,
+            "frames": self.__frames
+        }
+        with open(self.__path, 'w') as replay_file:
+            json.dump(recording, replay_file, separators=(",", ":"))
+
+    def __serialize_event(self, event) -> list:
+        """
+        Turn an event into [type, attributes], dropping attributes that do not survive JSON
+        """
+        attributes = {}
+        for key, value in event.dict.items():
+            if isinstance(value, (bool, int, float, str)) or value is None:
+                attributes[key] = value
+            elif isinstance(value, tuple):
+                attributes[key] = list(value)
+        return [event.type, attributes]
+
+    def __deserialize_event(self, event: list):
+        """
+        Turn [type, attributes] back into a pygame event
+        """
+        event_type, attributes = event
+        attributes = {key: tuple(value) if isinstance(value, list) else value for key, value in attributes.items()}
+        return pygame.event.Event(event_type, attributes)
@@ -1,28 +1,126 @@
-import os
-
-import yaml
+import os, re, atexit, base64, threading, time
+from typing import Dict, List
 
 import appdirs
 
+from config import SettingsConfig
 from misc import Singleton
+from save_formats import SAVE_BACKENDS, SaveFormatError, decode_blob, encode_blob, get_save_backend
+
+SAVE_WRITE_DELAY_SECONDS = 0.5 # How long the writer waits for more changes before writing them all in one go
+SAVE_SCHEMA_VERSION = 2
+
+def migrate_save(contents: Dict, schema_version: int) -> Dict:
+    """
+    Bring a save written by an older version of the game up to SAVE_SCHEMA_VERSION, one version at a time
+    """
+    if schema_version > SAVE_SCHEMA_VERSION:
+        print(f"Save schema version {schema_version} is newer than this game ({SAVE_SCHEMA_VERSION}), loading it anyway")
+    if schema_version < 1:
+        # 0: the original save.yml, no version, keys could be missing
+        defaults = SaveDataManager.get_default_save()
+        contents = {**defaults, **contents}
+    if schema_version < 2:
+        # 2: lore progress is saved
+        contents.setdefault("curr_lore", 0)
+    return contents
+
+def get_save_dir() -> str:
+    """
+    Where the player's saves live
+    """
+    return appdirs.user_data_dir("Instance", "boredhero")
+
+def read_last_played_save(save_dir: str | None = None, save_format: str | None = None) -> Dict:
+    """
+    The contents of the slot the game would load, read only: nothing is created, migrated or written
+    Defaults if there is no save yet, save_format defaults to the save_format setting
+    """
+    save_dir = save_dir or get_save_dir()
+    backends = [get_save_backend(save_format or SettingsConfig().save_format)]
+    backends += [backend_class() for backend_class in SAVE_BACKENDS.values() if backend_class.name != backends[0].name]
+    slot = 0
+    for backend in backends:
+        index_name = os.path.join(save_dir, f"save_index.{backend.extension}")
+        if os.path.isfile(index_name):
+            try:
+                slot = backend.load(index_name)[1].get("last_slot", 0)
+                break
+            except (OSError, SaveFormatError) as e:
+                print("Save index failed to load", e)
+    slot_name = "save" if slot == 0 else f"save_{slot}"
+    for backend in backends:
+        path = os.path.join(save_dir, f"{slot_name}.{backend.extension}")
+        if os.path.isfile(path):
+            try:
+                schema_version, contents = backend.load(path)
+                return migrate_save(contents, schema_version)
+            except (OSError, SaveFormatError) as e:
+                print(f"Save file {path} failed to load", e)
+    return SaveDataManager.get_default_save()
+
+def encode_recorded_save(contents: Dict) -> str:
+    """
+    Save contents as text for a replay recording (JSON), the binary save encoding in base64 since saves hold bytes
+    """
+    return base64.b64encode(encode_blob(contents, SAVE_SCHEMA_VERSION)).decode("ascii")
+
+def decode_recorded_save(encoded: str) -> Dict:
+    """
+    Undo encode_recorded_save
+    """
+    schema_version, contents = decode_blob(base64.b64decode(encoded))
+    return migrate_save(contents, schema_version)
 
 class SaveDataManager(metaclass=Singleton):
 
-    def __init__(self):
+    def __init__(self, save_dir: str | None = None, initial_contents: Dict | None = None, save_format: str | None = None):
         """
         SaveFile Manager
-        """
-        self.__save_dir = appdirs.user_data_dir("Instance", "boredhero")
+        Setters only change the save in memory, a writer thread writes it out shortly after (write-behind),
+        so a burst of changes costs a single write. Writes go to a temp file that replaces the save, so a crash
+        mid-write never leaves a half written save behind. Call flush() to write pending changes right away
+        Saves live in numbered slots (slot 0 is the original save file), a small index file keeps a summary
+        of every slot so they can be listed without loading each one
+        save_dir and initial_contents are for record and replay mode: a throwaway directory, with slot 0 started from initial_contents
+        save_format defaults to the save_format setting
+        """
+        self.__save_dir = save_dir or get_save_dir()
         os.makedirs(self.__save_dir, exist_ok=True)
-        self.save_name = os.path.join(self.__save_dir, "save.yml")
+        self.__backend = get_save_backend(save_format or SettingsConfig().save_format)
+        if initial_contents is not None:
+            self.__write_save_file(initial_contents, path=self.get_slot_save_name(0))
+        self.index_name = os.path.join(self.__save_dir, f"save_index.{self.__backend.extension}")
         self.__save_contents = {}
+        self.__lock = threading.Lock() # Guards __save_contents, __index and the dirty flags
+        self.__write_lock = threading.Lock() # Only one write at a time, the writer thread vs flush()
+        self.__dirty = False
+        self.__index_dirty = False
+        self.__wake_writer = threading.Event()
+        self.__load_index()
+        self.__slot = self.__index.get("last_slot", 0)
+        self.save_name = self.get_slot_save_name(self.__slot)
         self.__load_save()
+        self.__apply_save()
+        if self.__slot not in self.__index["slots"]:
+            self.__index["slots"][self.__slot] = self.__get_summary(self.__save_contents)
+            self.__index_dirty = True
+            self.__wake_writer.set()
+        self.__writer = threading.Thread(target=self.__write_behind, name="save-writer", daemon=True)
+        self.__writer.start()
+        atexit.register(self.flush) # Backstop for exits that skip InstanceMain.graceful_exit
+
+    def __apply_save(self):
+        """
+        Pull the values we hand out out of the save contents
+        """
         self.__player_name = self.__save_contents.get("player_name")
         if self.__player_name == "None":
             self.__player_name = None
         self.__player_x = self.__save_contents.get("player_x")
         self.__player_y = self.__save_contents.get("player_y")
         self.__shown_intro_and_controls = bool(self.__save_contents.get("shown_intro_and_controls"))
+        self.__curr_lore = self.__save_contents.get("curr_lore", 0)
 
     def get_shown_intro_and_controls(self):
         """
@@ -34,8 +132,7 @@ class SaveDataManager(metaclass=Singleton):
         """
         Set shown intro and controls
         """
-        self.__save_contents["shown_intro_and_controls"] = shown
-        self.__write_save_yml_file(self.__save_contents)
+        self.__update_save("shown_intro_and_controls", shown)
         self.__shown_intro_and_controls = shown
 
     def get_player_name(self):
@@ -48,8 +145,7 @@ class SaveDataManager(metaclass=Singleton):
         """
         Set the player name
         """
-        self.__save_contents["player_name"] = name
-        self.__write_save_yml_file(self.__save_contents)
+        self.__update_save("player_name", name)
         self.__player_name = name
 
     def get_player_x(self):
@@ -62,8 +158,7 @@ class SaveDataManager(metaclass=Singleton):
         """
         Set the player x coordinate
         """
-        self.__save_contents["player_x"] = x
-        self.__write_save_yml_file(self.__save_contents)
+        self.__update_save("player_x", x)
         self.__player_x = x
 
     def get_player_y(self):
@@ -76,36 +171,242 @@ class SaveDataManager(metaclass=Singleton):
         """
         Set the player y coordinate
         """
-        self.__save_contents["player_y"] = y
-        self.__write_save_yml_file(self.__save_contents)
+        self.__update_save("player_y", y)
         self.__player_y = y
 
+    def get_curr_lore(self) -> int:
+        """
+        Get how many lore objects have been found
+        """
+        return self.__curr_lore
+
+    def set_curr_lore(self, curr_lore: int):
+        """
+        Set how many lore objects have been found
+        """
+        self.__update_save("curr_lore", curr_lore)
+        self.__curr_lore = curr_lore
+
+    def get_game_snapshot(self) -> bytes | None:
+        """
+        Get the snapshot of every scene saved when the game was last quit, see InstanceMain.snapshot_game
+        """
+        return self.__save_contents.get("game_snapshot")
+
+    def set_game_snapshot(self, snapshot: bytes | None):
+        """
+        Set the snapshot of every scene to resume from
+        """
+        self.__update_save("game_snapshot", snapshot)
+
+    def get_slot(self) -> int:
+        """
+        Get the save slot in use
+        """
+        return self.__slot
+
+    def get_slot_save_name(self, slot: int) -> str:
+        """
+        Path of a slot's save file, slot 0 keeps the original save file name
+        """
+        if slot == 0:
+            return os.path.join(self.__save_dir, f"save.{self.__backend.extension}")
+        return os.path.join(self.__save_dir, f"save_{slot}.{self.__backend.extension}")
+
+    def get_slot_summaries(self) -> List[Dict]:
+        """
+        Summary (slot, player_name, lore_count, last_played) of every slot, most recently played first
+        Comes from the index, no save files are read
+        """
+        with self.__lock:
+            summaries = [{"slot": slot, **summary} for slot, summary in self.__index["slots"].items()]
+        return sorted(summaries, key=lambda summary: summary.get("last_played") or 0, reverse=True)
+
+    def select_slot(self, slot: int):
+        """
+        Switch to another save slot, anything pending for the current one is written first
+        """
+        self.flush()
+        with self.__lock:
+            self.__slot = slot
+            self.save_name = self.get_slot_save_name(slot)
+            self.__load_save()
+            self.__index["last_slot"] = slot
+            self.__index["slots"][slot] = self.__get_summary(self.__save_contents)
+            self.__index_dirty = True
+        self.__apply_save()
+        self.__wake_writer.set()
+
+    def create_slot(self) -> int:
+        """
+        Start a new game in the first unused slot and switch to it
+        """
+        with self.__lock:
+            slot = 0
+            while slot in self.__index["slots"] or os.path.isfile(self.get_slot_save_name(slot)):
+                slot += 1
+        self.select_slot(slot)
+        return slot
+
+    def __get_summary(self, contents: Dict) -> Dict:
+        """
+        What the index keeps about a slot
+        """
+        player_name = contents.get("player_name")
+        return {
+            "player_name": None if player_name == "None" else player_name,
+            "lore_count": contents.get("curr_lore", 0),
+            "last_played": int(time.time())
+        }
+
+    def __load_index(self):
+        """
+        Load the slot index, rebuilt from the save files if it is missing or damaged
+        """
+        self.__index = None
+        if os.path.isfile(self.index_name):
+            try:
+                _, self.__index = self.__backend.load(self.index_name)
+            except (OSError, SaveFormatError) as e:
+                print("Save index failed to load, rebuilding it", e)
+        if self.__index is None or "slots" not in self.__index:
+            self.__index = self.__rebuild_index()
+            self.__write_save_file(self.__index, path=self.index_name)
+
+    def __rebuild_index(self) -> Dict:
+        """
+        Scan every slot's save file (in any format) for its summary, the slow path the index exists to avoid
+        """
+        index = {"last_slot": 0, "slots": {}}
+        slot_pattern = re.compile(r"^save(?:_(\d+))?\.(\w+)$")
+        extensions = {backend_class.extension: backend_class for backend_class in SAVE_BACKENDS.values()}
+        for file_name in sorted(os.listdir(self.__save_dir)):
+            match = slot_pattern.match(file_name)
+            if match is None or match.group(2) not in extensions:
+                continue
+            slot = int(match.group(1) or 0)
+            if slot in index["slots"] and match.group(2) != self.__backend.extension:
+                continue # The current format wins over a leftover from before a migration
+            try:
+                schema_version, contents = extensions[match.group(2)]().load(os.path.join(self.__save_dir, file_name))
+            except Exception as e:
+                print(f"Save file {file_name} failed to load while rebuilding the index", e)
+                continue
+            summary = self.__get_summary(migrate_save(contents, schema_version))
+            summary["last_played"] = int(os.path.getmtime(os.path.join(self.__save_dir, file_name)))
+            index["slots"][slot] = summary
+        return index
+
+    def __update_save(self, key: str, value):
+        """
+        Change one value in memory and let the writer thread know there is something to write
+        """
+        with self.__lock:
+            if key in self.__save_contents and self.__save_contents[key] == value:
+                return
+            self.__save_contents[key] = value
+            self.__dirty = True
+        self.__wake_writer.set()
+
+    def __write_behind(self):
+        """
+        Writer thread: wait for changes, give them a moment to pile up, then write them all at once
+        """
+        while True:
+            self.__wake_writer.wait()
+            time.sleep(SAVE_WRITE_DELAY_SECONDS)
+            self.__wake_writer.clear() # Before the snapshot, anything changed after it wakes us up again
+            self.__write_if_dirty()
+
+    def __write_if_dirty(self):
+        """
+        Write a snapshot of the save (and the index) if anything changed since the last write
+        """
+        with self.__write_lock:
+            with self.__lock:
+                if not self.__dirty and not self.__index_dirty:
+                    return
+                contents = None
+                save_name = self.save_name
+                if self.__dirty:
+                    contents = dict(self.__save_contents)
+                    self.__index["slots"][self.__slot] = self.__get_summary(contents)
+                index = {"last_slot": self.__index["last_slot"], "slots": dict(self.__index["slots"])}
+                self.__dirty = False
+                self.__index_dirty = False
+            if contents is not None and not self.__write_save_file(contents, path=save_name):
+                with self.__lock:
+                    self.__dirty = True # Try again on the next change or flush()
+            if not self.__write_save_file(index, path=self.index_name):
+                with self.__lock:
+                    self.__index_dirty = True
+
+    def flush(self):
+        """
+        Write any pending changes to disk now, blocks until they are written
+        """
+        self.__write_if_dirty()
+
     def __load_save(self):
         """
         Load save file from disk, create if it does not exist
+        A save in another format (like the original save.yml) is migrated over to the current one
         """
         exists = os.path.isfile(self.save_name)
         if exists is True:
             try:
-                with open(self.save_name, 'r') as save_file:
-                    self.__save_contents = yaml.unsafe_load(save_file) # pylint: disable=no-value-for-parameter
-            except Exception as e:
+                schema_version, contents = self.__backend.load(self.save_name)
+                self.__save_contents = migrate_save(contents, schema_version)
+            except (OSError, SaveFormatError) as e:
                 print("Save file failed to load initially, creating a new one", e)
                 self.__save_contents = self.get_default_save()
+        elif self.__migrate_other_format():
+            return
         else:
+            self.__save_contents = self.get_default_save()
+            if not self.__write_save_file(self.__save_contents):
+                print("Save file failed to load on write, using defaults")
+
+    def __migrate_other_format(self) -> bool:
+        """
+        Look for this slot's save in any other format and convert it to the current one, the old file is left alone
+        """
+        base_name = os.path.splitext(self.save_name)[0]
+        for backend_class in SAVE_BACKENDS.values():
+            backend = backend_class()
+            other_save_name = f"{base_name}.{backend.extension}"
+            if backend.name == self.__backend.name or not os.path.isfile(other_save_name):
+                continue
             try:
-                with open(self.save_name, 'w') as save_file:
-                    yaml.dump(self.get_default_save(), save_file)
-                    self.__save_contents = self.get_default_save()
+                schema_version, contents = backend.load(other_save_name)
             except Exception as e:
-                print("Save file failed to load on write, using defaults", e)
-                self.__save_contents = self.get_default_save()
+                print(f"Save file {other_save_name} failed to load for migration", e)
+                continue
+            self.__save_contents = migrate_save(contents, schema_version)
+            if self.__write_save_file(self.__save_contents):
+                print(f"Migrated {other_save_name} to {self.save_name}")
+            return True
+        return False
+
+    def export_save(self, path: str | None = None, save_format: str = "yaml") -> str | None:
+        """
+        Write a copy of the save in another format (YAML by default, human readable), returns where it went
+        """
+        backend = get_save_backend(save_format)
+        if path is None:
+            path = os.path.join(self.__save_dir, f"save_export.{backend.extension}")
+        self.flush()
+        with self.__lock:
+            contents = dict(self.__save_contents)
+        if not self.__write_save_file(contents, path=path, backend=backend):
+            return None
+        return path
 
     def get_save_refresh(self):
         """
         Get the save after reloading the file from disk (slower)
         """
-        self.__load_save()
+        self.refresh_from_disk()
         return self.__save_contents
 
     def get_save_no_refresh(self):
@@ -114,7 +415,8 @@ class SaveDataManager(metaclass=Singleton):
         """
         return self.__save_contents
 
-    def get_default_save(self):
+    @staticmethod
+    def get_default_save():
         """
         Default save to write if no config exists somehow
         """
@@ -123,30 +425,47 @@ class SaveDataManager(metaclass=Singleton):
             "player_x": 0,
             "player_y": 0,
             "shown_main_intro_and_controls": False,
+            "curr_lore": 0,
         }
 
-    def __write_save_yml_file(self, contents: dict | None = None):
+    def __write_save_file(self, contents: dict | None = None, path: str | None = None, backend = None) -> bool:
         """
-        Write save file to disc
+        Write save file to disc, atomically: written to a temp file first, then swapped in
         NOTE: If contents are None, the default save will be written to disk
         """
         if contents is None:
             contents = self.get_default_save()
+        if path is None:
+            path = self.save_name
+        if backend is None:
+            backend = self.__backend
+        temp_name = f"{path}.tmp"
         try:
-            with open(self.save_name, 'w') as save_file:
-                yaml.dump(contents, save_file)
+            with open(temp_name, 'wb' if backend.binary else 'w') as save_file:
+                backend.dump(contents, SAVE_SCHEMA_VERSION, save_file)
+                save_file.flush()
+                os.fsync(save_file.fileno())
+            os.replace(temp_name, path)
         except Exception as e:
             print("Save file failed to write to disk", e)
-        self.refresh_from_disk()
+            return False
+        return True
 
     def write_default_save(self):
         """
         Write default save file to disk
         """
-        self.__write_save_yml_file()
+        with self.__lock:
+            self.__save_contents = self.get_default_save()
+            self.__dirty = True
+        self.flush()
+        self.__apply_save()
 
     def refresh_from_disk(self):
         """
-        Re-Run __init__ on this Singleton class, thus changing the values to match those on disk
+        Reload the save from disk, after writing out anything still pending so it isn't lost
         """
-        self.__init__() # pylint: disable=unnecessary-dunder-call
+        self.flush()
+        with self.__lock:
+            self.__load_save()
+        self.__apply_save()
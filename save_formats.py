@@ -0,0 +1,234 @@
+import struct, zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple
+
+import yaml
+
+BINARY_SAVE_MAGIC = b"INSV"
+BINARY_HEADER = struct.Struct("<4sHH") # magic, schema version, flags
+FLAG_ZLIB = 1
+
+# One byte type tag in front of every value
+TAG_NONE = b"N"[0]
+TAG_TRUE = b"T"[0]
+TAG_FALSE = b"F"[0]
+TAG_INT8 = b"i"[0]
+TAG_INT64 = b"I"[0]
+TAG_BIG_INT = b"J"[0]
+TAG_FLOAT = b"d"[0]
+TAG_STR = b"s"[0]
+TAG_BYTES = b"b"[0]
+TAG_LIST = b"l"[0]
+TAG_TUPLE = b"t"[0]
+TAG_DICT = b"m"[0]
+
+INT8 = struct.Struct("<b")
+INT64 = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+LENGTH = struct.Struct("<I")
+
+class SaveFormatError(Exception):
+    """
+    A save file that isn't in the format it claims to be, or is damaged
+    """
+
+def encode_value(value: Any, out: bytearray) -> None:
+    """
+    Append the tagged binary encoding of value to out
+    Handles what saves are made of: None, bools, ints, floats, strings, bytes, lists, tuples and dicts
+    Exact type checks come first, most common first, since this runs once per value in the save
+    """
+    value_type = type(value)
+    if value_type is int:
+        if -128 <= value <= 127:
+            out.append(TAG_INT8)
+            out += INT8.pack(value)
+        elif -2**63 <= value < 2**63:
+            out.append(TAG_INT64)
+            out += INT64.pack(value)
+        else:
+            encoded = str(value).encode("ascii")
+            out.append(TAG_BIG_INT)
+            out += LENGTH.pack(len(encoded))
+            out += encoded
+    elif value_type is str:
+        encoded = value.encode("utf-8")
+        out.append(TAG_STR)
+        out += LENGTH.pack(len(encoded))
+        out += encoded
+    elif value_type is float:
+        out.append(TAG_FLOAT)
+        out += FLOAT.pack(value)
+    elif value_type is dict:
+        out.append(TAG_DICT)
+        out += LENGTH.pack(len(value))
+        for key, item in value.items():
+            encode_value(key, out)
+            encode_value(item, out)
+    elif value_type is list or value_type is tuple:
+        out.append(TAG_TUPLE if value_type is tuple else TAG_LIST)
+        out += LENGTH.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    elif value is None:
+        out.append(TAG_NONE)
+    elif value is True:
+        out.append(TAG_TRUE)
+    elif value is False:
+        out.append(TAG_FALSE)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(TAG_BYTES)
+        out += LENGTH.pack(len(value))
+        out += value
+    elif isinstance(value, (int, float, str, list, tuple, dict)):
+        # Subclasses (enums, named tuples...) are saved as their plain base type
+        for base_type in (int, float, str, list, tuple, dict):
+            if isinstance(value, base_type):
+                encode_value(base_type(value), out)
+                return
+    else:
+        raise SaveFormatError(f"Can't save a {value_type.__name__}")
+
+def decode_value(data: bytes, pos: int = 0) -> Tuple[Any, int]:
+    """
+    Decode one value starting at pos, returns (value, position after it)
+    """
+    tag = data[pos]
+    pos += 1
+    if tag == TAG_INT8:
+        return INT8.unpack_from(data, pos)[0], pos + 1
+    if tag == TAG_STR:
+        end = pos + 4 + LENGTH.unpack_from(data, pos)[0]
+        if end > len(data):
+            raise SaveFormatError("Save data ends in the middle of a value")
+        return data[pos + 4:end].decode("utf-8"), end
+    if tag == TAG_INT64:
+        return INT64.unpack_from(data, pos)[0], pos + 8
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack_from(data, pos)[0], pos + 8
+    if tag == TAG_DICT:
+        count = LENGTH.unpack_from(data, pos)[0]
+        pos += 4
+        result = {}
+        for _ in range(count):
+            key, pos = decode_value(data, pos)
+            result[key], pos = decode_value(data, pos)
+        return result, pos
+    if tag == TAG_LIST or tag == TAG_TUPLE:
+        count = LENGTH.unpack_from(data, pos)[0]
+        pos += 4
+        items = []
+        for _ in range(count):
+            item, pos = decode_value(data, pos)
+            items.append(item)
+        return (tuple(items) if tag == TAG_TUPLE else items), pos
+    if tag == TAG_NONE:
+        return None, pos
+    if tag == TAG_TRUE:
+        return True, pos
+    if tag == TAG_FALSE:
+        return False, pos
+    if tag == TAG_BYTES or tag == TAG_BIG_INT:
+        end = pos + 4 + LENGTH.unpack_from(data, pos)[0]
+        if end > len(data):
+            raise SaveFormatError("Save data ends in the middle of a value")
+        raw = bytes(data[pos + 4:end])
+        return (int(raw.decode("ascii")) if tag == TAG_BIG_INT else raw), end
+    raise SaveFormatError(f"Unknown value tag {tag!r} at byte {pos - 1}")
+
+def encode_blob(value: Any, schema_version: int, compress: bool = True) -> bytes:
+    """
+    Header (magic, schema version, flags) followed by the (zlib compressed) encoding of value
+    """
+    payload = bytearray()
+    encode_value(value, payload)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 1) # Most of the win for a fraction of the time of higher levels
+        flags |= FLAG_ZLIB
+    return BINARY_HEADER.pack(BINARY_SAVE_MAGIC, schema_version, flags) + bytes(payload)
+
+def decode_blob(blob: bytes) -> Tuple[int, Any]:
+    """
+    Undo encode_blob, returns (schema version, value)
+    """
+    if len(blob) < BINARY_HEADER.size:
+        raise SaveFormatError("Save data is too short to have a header")
+    magic, schema_version, flags = BINARY_HEADER.unpack_from(blob, 0)
+    if magic != BINARY_SAVE_MAGIC:
+        raise SaveFormatError("Not an Instance binary save")
+    payload = bytes(blob[BINARY_HEADER.size:])
+    try:
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        value, end = decode_value(payload)
+    except (zlib.error, struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+        raise SaveFormatError(f"Damaged save data: {e}") from e
+    if end != len(payload):
+        raise SaveFormatError("Trailing bytes after the save data")
+    return schema_version, value
+
+class SaveBackend(ABC):
+    """
+    Base class for save file formats, reads and writes a save's contents dict along with its schema version
+    """
+    name = "base"
+    extension = ""
+    binary = True
+
+    @abstractmethod
+    def load(self, path: str) -> Tuple[int, Dict]:
+        """
+        Read a save file, returns (schema version, contents)
+        """
+
+    @abstractmethod
+    def dump(self, contents: Dict, schema_version: int, save_file) -> None:
+        """
+        Write contents to an open file
+        """
+
+class BinarySaveBackend(SaveBackend):
+    """
+    Compact tagged binary encoding, zlib compressed, with the schema version in the header
+    """
+    name = "binary"
+    extension = "bin"
+    binary = True
+
+    def load(self, path: str) -> Tuple[int, Dict]:
+        with open(path, 'rb') as save_file:
+            return decode_blob(save_file.read())
+
+    def dump(self, contents: Dict, schema_version: int, save_file) -> None:
+        save_file.write(encode_blob(contents, schema_version))
+
+class YamlSaveBackend(SaveBackend):
+    """
+    The original human readable save.yml, the schema version is stored as a key (missing in old saves, so 0)
+    """
+    name = "yaml"
+    extension = "yml"
+    binary = False
+
+    def load(self, path: str) -> Tuple[int, Dict]:
+        try:
+            with open(path, 'r') as save_file:
+                contents = yaml.unsafe_load(save_file) or {} # pylint: disable=no-value-for-parameter
+        except yaml.YAMLError as e:
+            raise SaveFormatError(f"Damaged save data: {e}") from e
+        return contents.pop("schema_version", 0), contents
+
+    def dump(self, contents: Dict, schema_version: int, save_file) -> None:
+        yaml.dump({**contents, "schema_version": schema_version}, save_file)
+
+SAVE_BACKENDS = {
+    BinarySaveBackend.name: BinarySaveBackend,
+    YamlSaveBackend.name: YamlSaveBackend
+}
+
+def get_save_backend(name: str | None) -> SaveBackend:
+    """
+    Get a save backend by name, unknown names fall back to the binary one
+    """
+    return SAVE_BACKENDS.get(name, BinarySaveBackend)()
@@ -59,6 +59,12 @@ class SettingsMenu:
             ("Fullscreen", "Fullscreen"),
             ("Borderless", "Borderless")
         ]
+        self.maze_algorithm = [
+            ("Depth First Search", "dfs"),
+            ("Wilson's", "wilson"),
+            ("Eller's", "eller"),
+            ("Kruskal's", "kruskal")
+        ]
         self.settings = pm.Menu(title="Settings",
                                 width=self.__settingsconfig.screen_width,
                                 height=self.__settingsconfig.screen_height,
@@ -68,6 +74,7 @@ class SettingsMenu:
         self.settings._theme.widget_alignment = pm.locals.ALIGN_LEFT
         current_res = self.__get_current_resolution_index()
         current_window_mode = self.__get_current_window_mode_index()
+        current_maze_algorithm = self.__get_current_maze_algorithm_index()
         self.settings.add.dropselect(title="Screen Resolution: ", items=self.resolution, default=current_res, dropselect_id="screen_resolution", selection_box_height=6, open_middle=False)
         self.settings.add.dropselect(title="Window Mode: ", items=self.window_mode, default=current_window_mode, dropselect_id="window_mode", selection_box_height=6, open_middle=False)
         self.settings.add.toggle_switch(title="Subtitles", default=self.__settingsconfig.subtitles, toggleswitch_id="subtitles")
@@ -81,8 +88,9 @@ class SettingsMenu:
         self.settings.add.range_slider(title="Puzzle 1 Difficulty (Fitts's Law)", default=int(self.__settingsconfig.puzzle_1_difficulty_fitts), range_values=(25, 40), increment=0.5, rangeslider_id="puzzle_one_diff_fitts", value_format=lambda x: str(round(x, None)))
         self.settings.add.range_slider(title="Puzzle 2 Difficulty (Speed): ", default=int(self.__settingsconfig.puzzle_2_difficulty_speed), range_values=(1, 50), increment=1, rangeslider_id="puzzle_two_diff_speed", value_format=lambda x: str(round(x, None)))
         self.settings.add.range_slider(title="Puzzle 2 Difficulty (Number): ", default=int(self.__settingsconfig.puzzle_2_difficulty_number), range_values=(1, 50), increment=1, rangeslider_id="puzzle_two_diff_number", value_format=lambda x: str(round(x, None)))
-        self.settings.add.range_slider(title="Puzzle 3 Difficulty (Size): ", default=int(self.__settingsconfig.puzzle_3_difficulty_size), range_values=(20, 80),
+        self.settings.add.range_slider(title="Puzzle 3 Difficulty (Size): ", default=int(self.__settingsconfig.puzzle_3_difficulty_size), range_values=(20, 2000),
         increment=1, rangeslider_id="puzzle_three_diff_size", value_format=lambda x: str(round(x, None)))
+        self.settings.add.dropselect(title="Puzzle 3 Maze Algorithm: ", items=self.maze_algorithm, default=current_maze_algorithm, dropselect_id="puzzle_three_algorithm", selection_box_height=6, open_middle=False)
         self.settings.add.button(title=f"Interact Keybind: {self.__keybinds['interact']}", action=self.listen_for_interact_key, button_id='interact_keybind_button', font_color=GameColors.WHITE.value)
         self.settings.add.button(title=f"Up Keybind: {self.__keybinds['up']}", action=self.listen_for_up_key, button_id='up_keybind_button', font_color=GameColors.WHITE.value)
         self.settings.add.button(title=f"Down Keybind: {self.__keybinds['down']}", action=self.listen_for_down_key, button_id='down_keybind_button', font_color=GameColors.WHITE.value)
@@ -198,6 +206,7 @@ class SettingsMenu:
         puzzle_2_difficulty_speed = None
         puzzle_2_difficulty_number = None
         puzzle_3_difficulty_size = None
+        puzzle_3_algorithm = None
         subtitles = None
         debug = None
         fancy_fonts = None
@@ -262,6 +271,10 @@ class SettingsMenu:
                     puzzle_3_difficulty_size = int(value)
                     if puzzle_3_difficulty_size is None:
                         puzzle_3_difficulty_size = int(self.__settingsconfig.puzzle_3_difficulty_size)
+                case "puzzle_three_algorithm":
+                    puzzle_3_algorithm = value[0][1]
+                    if puzzle_3_algorithm is None:
+                        puzzle_3_algorithm = self.__settingsconfig.puzzle_3_algorithm
                 case "max_fps":
                     max_fps = value
                     if int(max_fps) < 30:
@@ -270,8 +283,10 @@ class SettingsMenu:
                         max_fps = 144
                     if max_fps is None:
                         max_fps = self.__settingsconfig.max_fps
-            self.__glogger.info(f"{key}\t:\t{value}", name=__name__)
-            wd = {
+            self.__glogger.info("%s\t:\t%s", key, value, name=__name__)
+            # Start from the current settings so keys the menu does not show are kept
+            wd = dict(self.__settingsconfig.get_settings_no_refresh())
+            wd.update({
                 "screen_width": screen_width,
                 "screen_height": screen_height,
                 "window_mode": window_mode,
@@ -283,6 +298,7 @@ class SettingsMenu:
                 "puzzle_2_difficulty_speed": puzzle_2_difficulty_speed,
                 "puzzle_2_difficulty_number": puzzle_2_difficulty_number,
                 "puzzle_3_difficulty_size": puzzle_3_difficulty_size,
+                "puzzle_3_algorithm": puzzle_3_algorithm,
                 "subtitles": subtitles,
                 "debug": debug,
                 "fancy_fonts": fancy_fonts,
@@ -292,7 +308,7 @@ class SettingsMenu:
                 "keybind_right": self.__keybinds['right'],
                 "keybind_left": self.__keybinds['left'],
                 "keybind_interact": self.__keybinds['interact']
-            }
+            })
             try:
                 with open(self.__settingsconfig.config_name, 'w') as settings_file:
                     yaml.dump(wd, settings_file)
@@ -317,6 +333,7 @@ class SettingsMenu:
             "puzzle_2_difficulty_speed": self.__settingsconfig.puzzle_2_difficulty_speed,
             "puzzle_2_difficulty_number": self.__settingsconfig.puzzle_2_difficulty_number,
             "puzzle_3_difficulty_size": self.__settingsconfig.puzzle_3_difficulty_size,
+            "puzzle_3_algorithm": self.__settingsconfig.puzzle_3_algorithm,
             "subtitles": self.__settingsconfig.subtitles,
             "fancy_fonts": self.__settingsconfig.fancy_fonts,
             "grayscale_mode": self.__settingsconfig.grayscale_mode,
@@ -357,3 +374,12 @@ class SettingsMenu:
                 return 2
             case _:
                 return 0
+
+    def __get_current_maze_algorithm_index(self) -> int:
+        """
+        Get the current maze algorithm index
+        """
+        for index, (_, algorithm) in enumerate(self.maze_algorithm):
+            if algorithm == self.__settingsconfig.puzzle_3_algorithm:
+                return index
+        return 0
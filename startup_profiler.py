@@ -0,0 +1,112 @@
+import importlib, json, platform, sys, time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# NOTE: Standard library only (no misc), this gets imported before everything it measures
+
+class StartupProfiler:
+
+    def __init__(self):
+        """
+        Records how long each part of startup takes, for instance.py --profile-startup
+        Does nothing (and costs nothing) unless enabled
+        """
+        self.enabled = False
+        self.report_path = None
+        self.__created_at = time.perf_counter()
+        self.__imports: List[Dict] = []
+        self.__phases: List[Dict] = []
+        self.__open_phases: Dict[str, float] = {}
+
+    def enable(self, report_path: str):
+        """
+        Start recording, the report is written to report_path by write_report() (which can still be changed until then)
+        """
+        self.enabled = True
+        self.report_path = report_path
+
+    def time_imports(self, module_names: List[str]):
+        """
+        Import each module in order and record how long it took
+        Modules already imported by an earlier one in the list only show what was left over, so order matters
+        """
+        for module_name in module_names:
+            already_loaded = module_name in sys.modules
+            start = time.perf_counter()
+            error = None
+            try:
+                importlib.import_module(module_name)
+            except ImportError as e:
+                error = str(e)
+            self.__imports.append({
+                "module": module_name,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                "already_loaded": already_loaded,
+                "error": error
+            })
+
+    def begin(self, name: str):
+        """
+        Start timing a phase
+        """
+        if self.enabled:
+            self.__open_phases[name] = time.perf_counter()
+
+    def end(self, name: str):
+        """
+        Stop timing a phase started with begin()
+        """
+        if not self.enabled or name not in self.__open_phases:
+            return
+        start = self.__open_phases.pop(name)
+        self.__phases.append({
+            "phase": name,
+            "ms": round((time.perf_counter() - start) * 1000, 3),
+            "started_at_ms": round((start - self.__created_at) * 1000, 3),
+            "depth": len(self.__open_phases)
+        })
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time the body of a with block as a phase
+        """
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def get_report(self) -> Dict:
+        """
+        Everything recorded so far
+        """
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False)), # True in the PyInstaller build
+            "total_ms": round((time.perf_counter() - self.__created_at) * 1000, 3),
+            "imports": self.__imports,
+            "phases": sorted(self.__phases, key=lambda phase: phase["started_at_ms"])
+        }
+
+    def write_report(self):
+        """
+        Write the report as JSON to report_path
+        """
+        if not self.enabled:
+            return
+        try:
+            with open(self.report_path, 'w') as report_file:
+                json.dump(self.get_report(), report_file, indent=2)
+            print(f"Startup profile written to {self.report_path}")
+        except Exception as e:
+            print("Startup profile failed to write to disk", e)
+
+_profiler = StartupProfiler()
+
+def get_startup_profiler() -> StartupProfiler:
+    """
+    The one StartupProfiler for this process
+    """
+    return _profiler
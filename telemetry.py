@@ -0,0 +1,147 @@
+import json, atexit, platform
+from typing import Any, List
+
+from config import GameConfig, SettingsConfig
+from game_logger import GameLogger
+from misc import Singleton, get_monotonic_time, get_seconds_since, get_unix_timestamp
+
+TELEMETRY_SCHEMA_VERSION = 1 # Bump when an event's fields change meaning, offline tools key on it
+FRAME_SUMMARY_SECONDS = 5 # One frames event per this many seconds of play, per scene
+
+class Telemetry(metaclass=Singleton):
+
+    def __init__(self):
+        """
+        Optional structured event stream next to the human readable log, one JSON object per line
+        Every event has "t", seconds since the session started on the monotonic clock, and "event", its type
+        Off by default (the telemetry setting), every call is then a single attribute check
+        """
+        self.__glogger = GameLogger()
+        self.__settings = SettingsConfig()
+        self.__file = None
+        self.__start = get_monotonic_time()
+        self.__scene = "menu"
+        self.__scene_entered = self.__start
+        self.__frame_times: List[int] = [] # ms per frame (including the wait for the FPS cap) since the last summary
+        self.__work_times: List[int] = [] # ...and the part of it spent actually running the frame
+        self.__summary_start = self.__start
+        self.enabled = False
+        self.set_enabled(self.__settings.telemetry)
+
+    def set_enabled(self, enabled: bool):
+        """
+        Start or stop writing telemetry, the session's file is appended to if it is turned back on
+        """
+        if enabled == self.enabled:
+            return
+        if not enabled:
+            self.close()
+            return
+        path = GameLogger().get_session_file_path(".telemetry.jsonl")
+        try:
+            self.__file = open(path, 'a', encoding="utf-8", buffering=64 * 1024) # pylint: disable=consider-using-with
+        except OSError as e:
+            self.__glogger.warning("Telemetry could not open %s, it stays off", path, name=__name__, exception=e)
+            return
+        self.enabled = True
+        atexit.unregister(self.close) # Only once, however often it is turned back on
+        atexit.register(self.close)
+        config = GameConfig()
+        self.event("session_start", schema_version=TELEMETRY_SCHEMA_VERSION, unix_time=get_unix_timestamp(), version=config.version,
+                   python=platform.python_version(), platform=platform.platform(), resolution=[self.__settings.screen_width, self.__settings.screen_height],
+                   max_fps=self.__settings.max_fps, fancy_fonts=self.__settings.fancy_fonts)
+        self.__glogger.info("Writing telemetry to %s", path, name=__name__)
+
+    def event(self, event: str, **fields: Any):
+        """
+        Write one event, fields have to be JSON serializable
+        """
+        if not self.enabled:
+            return
+        record = {"t": round(get_seconds_since(self.__start), 4), "event": event}
+        record.update(fields)
+        try:
+            self.__file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            self.__glogger.warning("Failed to write telemetry event %s", event, name=__name__, exception=e, every=60)
+
+    def scene_changed(self, scene: str):
+        """
+        Record a move to another scene ("menu" for anything that isn't the main map or a puzzle), with the time spent in the last one
+        """
+        if not self.enabled or scene == self.__scene:
+            return
+        self.summarize_frames() # Frame summaries never mix two scenes
+        now = get_monotonic_time()
+        self.event("scene", previous=self.__scene, scene=scene, previous_seconds=round(now - self.__scene_entered, 3))
+        self.__scene = scene
+        self.__scene_entered = now
+
+    def lore_found(self, lore: int):
+        """
+        Record a lore pickup, lore is its 0 based index in the story
+        """
+        if self.enabled:
+            self.event("lore", lore=lore, scene_seconds=round(get_seconds_since(self.__scene_entered), 3))
+
+    def puzzle_completed(self, puzzle: str):
+        """
+        Record a puzzle being solved, with how long it took since it was entered
+        """
+        if self.enabled:
+            self.event("puzzle_complete", puzzle=puzzle, seconds=round(get_seconds_since(self.__scene_entered), 3))
+
+    def frame(self, frame_ms: int, work_ms: int):
+        """
+        Add one frame to the current summary, from pygame's Clock.tick() and Clock.get_rawtime()
+        """
+        if not self.enabled:
+            return
+        self.__frame_times.append(frame_ms)
+        self.__work_times.append(work_ms)
+        if get_seconds_since(self.__summary_start) >= FRAME_SUMMARY_SECONDS:
+            self.summarize_frames()
+
+    def summarize_frames(self):
+        """
+        Write a frames event for the frames since the last one (count, FPS, mean and percentile frame times in ms)
+        """
+        now = get_monotonic_time()
+        frame_times = self.__frame_times
+        if frame_times:
+            work_times = sorted(self.__work_times)
+            elapsed = now - self.__summary_start
+            self.event("frames", scene=self.__scene, frames=len(frame_times), seconds=round(elapsed, 3),
+                       fps=round(len(frame_times) / elapsed, 2) if elapsed > 0 else None,
+                       frame_ms_mean=round(sum(frame_times) / len(frame_times), 2), frame_ms_max=max(frame_times),
+                       work_ms_p50=work_times[len(work_times) // 2], work_ms_p95=work_times[min(len(work_times) - 1, len(work_times) * 95 // 100)],
+                       work_ms_max=work_times[-1])
+            self.__frame_times = []
+            self.__work_times = []
+            self.flush()
+        self.__summary_start = now
+
+    def flush(self):
+        """
+        Push buffered events to disk, done with each frame summary so a crash loses at most a few seconds
+        """
+        if self.__file is not None:
+            try:
+                self.__file.flush()
+            except OSError as e:
+                self.__glogger.warning("Failed to flush telemetry", name=__name__, exception=e, every=60)
+
+    def close(self):
+        """
+        Write what is left and close the file
+        """
+        if not self.enabled:
+            return
+        self.summarize_frames()
+        self.event("session_end", scene=self.__scene)
+        self.enabled = False
+        try:
+            self.__file.close()
+        except OSError as e:
+            self.__glogger.warning("Failed to close telemetry", name=__name__, exception=e)
+        self.__file = None
@@ -0,0 +1,54 @@
+from typing import List, Tuple
+
+import pygame
+
+# Laying out and rendering a page of text once, so drawing a text screen is blits instead of a font.render per line or word
+
+def layout_centered_lines(font: pygame.font.Font, text: str, color: Tuple, center_x: int, start_y: int, line_spacing: int) -> Tuple[List[Tuple[pygame.Surface, pygame.Rect]], int]:
+    """
+    Render each line of text centered on center_x, the first line's center at start_y and each next one line_spacing lower
+    Returns (line surface, where it goes) pairs for one Surface.blits call, and the y the line after the last one would be centered at
+    NOTE: The lines are kept apart rather than merged into one surface, blending one big transparent block costs more than the lines
+    """
+    lines = []
+    y = start_y
+    for line in text.strip().split('\n'):
+        line_surface = font.render(line.strip(), True, color)
+        lines.append((line_surface, line_surface.get_rect(center=(center_x, y))))
+        y += line_spacing
+    return lines, y
+
+def layout_wrapped_words(font: pygame.font.Font, text: str, color: Tuple, max_width: int, margin: int = 10) -> List[Tuple[pygame.Surface, pygame.Rect]]:
+    """
+    Render text word by word from (margin, margin), wrapping a word to the next line when it would reach max_width
+    Returns (word surface, where it goes) pairs
+    """
+    words = []
+    space = font.size(' ')[0]
+    word_height = font.get_height()
+    x, y = margin, margin
+    for line in text.splitlines():
+        for word in line.split(' '):
+            word_surface = font.render(word, True, color)
+            word_width, word_height = word_surface.get_size()
+            if x + word_width >= max_width:
+                x = margin
+                y += word_height
+            words.append((word_surface, word_surface.get_rect(topleft=(x, y))))
+            x += word_width + space
+        x = margin
+        y += word_height
+    return words
+
+def flatten_layout(layout: List[Tuple[pygame.Surface, pygame.Rect]], background_color: Tuple) -> Tuple[pygame.Surface, pygame.Rect]:
+    """
+    Merge laid out pieces into one opaque surface filled with background_color, for text drawn over a solid background
+    Returns the surface and where it goes
+    """
+    if not layout:
+        return pygame.Surface((0, 0)), pygame.Rect(0, 0, 0, 0)
+    block_rect = layout[0][1].unionall([rect for _, rect in layout[1:]])
+    block = pygame.Surface(block_rect.size).convert()
+    block.fill(background_color)
+    block.blits([(piece, rect.move(-block_rect.x, -block_rect.y)) for piece, rect in layout], doreturn=False)
+    return block, block_rect
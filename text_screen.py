@@ -2,6 +2,7 @@ import pygame
 
 from config import SettingsConfig
 from save import SaveDataManager
+from text_layout import layout_centered_lines
 
 def get_main_game_intro_text():
     """
@@ -88,8 +89,8 @@ def get_credits_and_attributions_text():
     pygame (LGPL)\n
     pygame-menu (MIT)\n
     python-dotenv (BSD 3-Clause)\n
-    pytz (MIT)\n
     pyyaml (MIT)\n
+    tzdata (Apache 2.0)\n
         
     Fonts Used (License):\n
 
@@ -147,8 +148,10 @@ class TextScreen:
         """
         Class to display a screen with text and a button
         Useful for puzzle intros and outros
+        The page is laid out and rendered once, it is redone only if the text, font or screen size changes
         """
         self.screen = screen
+        self.__page = None # (key it was rendered for, text lines, button label)
         self.text = text
         self.button_text = button_text
         self.font = pygame.font.Font(None, 36)
@@ -156,28 +159,43 @@ class TextScreen:
         self.button_rect = pygame.Rect(0, 0, 100, 50)
         self.button_rect.center = (screen.get_width() // 2, screen.get_height() // 2 + 100)
 
+    @property
+    def text(self) -> str:
+        """
+        The page's text, setting it re-renders the page on the next draw
+        """
+        return self.__text
+
+    @text.setter
+    def text(self, text: str):
+        self.__text = text
+        self.__page = None
+
     def draw(self):
         """
         Draw the page
         """
-        lines = self.text.strip().split('\n')
+        page_key = (self.font, self.button_font, self.button_text, self.screen.get_size())
+        if self.__page is None or self.__page[0] != page_key:
+            self.__page = (page_key, *self.__render_page())
+        _, text_lines, button_text_surface = self.__page
+        self.screen.blits(text_lines, doreturn=False)
+        pygame.draw.rect(self.screen, (255, 255, 255), self.button_rect)  # White button
+        self.screen.blit(button_text_surface, button_text_surface.get_rect(center=self.button_rect.center))
+
+    def __render_page(self):
+        """
+        Lay out and render the text and the button label, and place the button below the text
+        """
         line_spacing = 22  # Adjust line spacing as needed
-        total_text_height = len(lines) * line_spacing
+        total_text_height = len(self.text.strip().split('\n')) * line_spacing
         # Calculate starting y-position to center the text and button
         start_y = (self.screen.get_height() - total_text_height - self.button_rect.height - line_spacing) // 2
-        # Draw each line of text
-        y_offset = start_y
-        for line in lines:
-            text_surface = self.font.render(line.strip(), True, (255, 255, 255))  # White text
-            text_rect = text_surface.get_rect(center=(self.screen.get_width() // 2, y_offset))
-            self.screen.blit(text_surface, text_rect)
-            y_offset += line_spacing
-        # Draw the button, positioned below the text
+        text_lines, y_offset = layout_centered_lines(self.font, self.text, (255, 255, 255), self.screen.get_width() // 2, start_y, line_spacing)  # White text
+        # The button goes below the text
         self.button_rect.center = (self.screen.get_width() // 2, y_offset + 20 + self.button_rect.height // 2)
-        pygame.draw.rect(self.screen, (255, 255, 255), self.button_rect)  # White button
         button_text_surface = self.button_font.render(self.button_text, True, (0, 0, 0))  # Black text
-        button_text_rect = button_text_surface.get_rect(center=self.button_rect.center)
-        self.screen.blit(button_text_surface, button_text_rect)
+        return text_lines, button_text_surface
 
     def handle_event(self, event):
         """
@@ -1,4 +1,4 @@
-from typing import Tuple, Any
+from typing import Any, Dict, List, Tuple
 from enum import Enum
 
 import pygame
@@ -6,7 +6,7 @@ import pygame.font
 from pygame.sprite import Sprite
 
 from config import SettingsConfig
-from misc import GameColors, Singleton
+from misc import GameColors, Singleton, get_human_readable_time_with_timezone
 
 class GameState(Enum):
     EXIT = -1
@@ -20,6 +20,8 @@ class GameState(Enum):
     PLAY_PUZZLE_3 = 9
     MLA_WORKS_CITED = 7
     INPUT_NAME = 8
+    NEW_GAME = 10
+    BACK = 11
 
 class CurrentGameState(metaclass=Singleton):
     """
@@ -210,6 +212,105 @@ class LevelSelectorUIElements():
             button.set_visibility(visibility)
         self.__title.set_visibility(visibility)
 
+class SaveSlotSelectorUIElements():
+    """
+    Save Slot Selector UI Elements
+    """
+
+    def __init__(self, slot_summaries: List[Dict]):
+        """
+        Save slot selector UI elements constructor
+        Takes the summaries from SaveDataManager.get_slot_summaries(), most recent first, and lists as many as fit
+        Slot buttons return their slot number as the action
+        """
+        self.__settings = SettingsConfig()
+        screen_height = self.__settings.screen_height
+        screen_width = self.__settings.screen_width
+        title_y = screen_height // 6
+        slot_y = title_y + 100
+        max_slots = max(0, (screen_height - slot_y - 150) // 50)
+        self.visibility = None
+        self.__title = UIElement(
+            center_position=(screen_width // 2, title_y),
+            font_size=60,
+            bg_rgb=GameColors.BLACK.value,
+            text_rgb=GameColors.WHITE.value,
+            text="Load Saved Game"
+        )
+        self.__buttons = []
+        for summary in slot_summaries[:max_slots]:
+            player_name = summary.get("player_name") or "New Player"
+            last_played = "Never"
+            if summary.get("last_played"):
+                last_played = get_human_readable_time_with_timezone(summary["last_played"])
+            self.__buttons.append(UIElement(
+                center_position=(screen_width // 2, slot_y),
+                font_size=30,
+                bg_rgb=GameColors.BLACK.value,
+                text_rgb=GameColors.WHITE.value,
+                text=f"Slot {summary['slot']}: {player_name} - {summary.get('lore_count', 0)} lore - {last_played}",
+                action=summary["slot"]
+            ))
+            slot_y += 50
+        self.__new_game = UIElement(
+            center_position=(screen_width // 2, slot_y + 50),
+            font_size=30,
+            bg_rgb=GameColors.BLACK.value,
+            text_rgb=GameColors.WHITE.value,
+            text="New Game",
+            action=GameState.NEW_GAME
+        )
+        self.__back = UIElement(
+            center_position=(screen_width // 2, slot_y + 100),
+            font_size=30,
+            bg_rgb=GameColors.BLACK.value,
+            text_rgb=GameColors.WHITE.value,
+            text="Back",
+            action=GameState.BACK
+        )
+        self.__buttons += [self.__new_game, self.__back]
+
+    @property
+    def buttons(self):
+        """
+        Buttons Property
+        """
+        return self.__buttons
+
+    @property
+    def title(self):
+        """
+        Title Property
+        """
+        return self.__title
+
+    def update(self, mouse_pos: Tuple, mouse_up: bool):
+        """
+        Update the mouse position mouse_over variable
+        """
+        for button in self.__buttons:
+            action = button.update(mouse_pos, mouse_up)
+            if action is not None:
+                return action
+        return None
+
+    def draw(self, surface):
+        """
+        Draw a surface element
+        """
+        for button in self.__buttons:
+            button.draw(surface)
+        self.__title.draw(surface)
+
+    def set_visibility(self, visibility: bool):
+        """
+        Toggle visibility of the UIElement
+        """
+        self.visibility = visibility
+        for button in self.__buttons:
+            button.set_visibility(visibility)
+        self.__title.set_visibility(visibility)
+
 class TitleScreenUIElements():
     """
     Title Screen UI Elements
@@ -221,9 +322,9 @@ class TitleScreenUIElements():
         """
         self.visibility = True
         self.__settings = SettingsConfig()
-        self.__quit_button_y_pos = 600
+        self.__quit_button_y_pos = 650
         if self.__settings.debug:
-            self.__quit_button_y_pos = 650
+            self.__quit_button_y_pos = 700
         self.__title = UIElement(
             center_position=(500, 300),
             font_size=60,
@@ -239,24 +340,24 @@ class TitleScreenUIElements():
             text="Play",
             action=GameState.PLAY
         )
-        #self.__load_button = UIElement(
-        #    center_position=(500, 450),
-        #    font_size=30,
-        #    bg_rgb=GameColors.BLACK.value,
-        #    text_rgb=GameColors.WHITE.value,
-        #    text="Load Saved Game",
-        #    action=GameState.LOAD_SAVE
-        #)
-        self.__settings_button = UIElement(
+        self.__load_button = UIElement(
             center_position=(500, 450),
             font_size=30,
             bg_rgb=GameColors.BLACK.value,
             text_rgb=GameColors.WHITE.value,
+            text="Load Saved Game",
+            action=GameState.LOAD_SAVE
+        )
+        self.__settings_button = UIElement(
+            center_position=(500, 500),
+            font_size=30,
+            bg_rgb=GameColors.BLACK.value,
+            text_rgb=GameColors.WHITE.value,
             text="Settings",
             action=GameState.SETTINGS
         )
         self.__credits_button = UIElement(
-            center_position=(500, 500),
+            center_position=(500, 550),
             font_size=30,
             bg_rgb=GameColors.BLACK.value,
             text_rgb=GameColors.WHITE.value,
@@ -264,7 +365,7 @@ class TitleScreenUIElements():
             action=GameState.CREDITS
         )
         self.__mla_works_cited_button = UIElement(
-            center_position=(500, 550),
+            center_position=(500, 600),
             font_size=30,
             bg_rgb=GameColors.BLACK.value,
             text_rgb=GameColors.WHITE.value,
@@ -273,7 +374,7 @@ class TitleScreenUIElements():
         )
         if self.__settings.debug:
             self.__debug_play_puzzle_button = UIElement(
-                center_position=(500, 600),
+                center_position=(500, 650),
                 font_size=30,
                 bg_rgb=GameColors.BLACK.value,
                 text_rgb=GameColors.WHITE.value,
@@ -289,9 +390,9 @@ class TitleScreenUIElements():
             action=GameState.EXIT
         )
         if self.__settings.debug:
-            self.__buttons = [self.__start_button, self.__settings_button, self.__credits_button, self.__mla_works_cited_button, self.__debug_play_puzzle_button, self.__quit_button]
+            self.__buttons = [self.__start_button, self.__load_button, self.__settings_button, self.__credits_button, self.__mla_works_cited_button, self.__debug_play_puzzle_button, self.__quit_button]
         else:
-            self.__buttons = [self.__start_button, self.__settings_button, self.__credits_button, self.__mla_works_cited_button, self.__quit_button]
+            self.__buttons = [self.__start_button, self.__load_button, self.__settings_button, self.__credits_button, self.__mla_works_cited_button, self.__quit_button]
 
     @property
     def buttons(self):